@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2009-2018 the sqlparse authors and contributors
+# <see AUTHORS file>
+#
+# This module is part of python-sqlparse and is released under
+# the BSD License: https://opensource.org/licenses/BSD-3-Clause
+
+"""Peak memory of parsestream() on a huge INSERT, with and without
+max_tokens.
+
+Usage: python benchmarks/bench_bounded.py [--rows N] [--max-tokens N]
+
+Requires Python 3 (tracemalloc). The statement is read from a file, the
+pieces are dropped as soon as they are yielded.
+"""
+
+from __future__ import print_function
+
+import argparse
+import io
+import os
+import tempfile
+import time
+import tracemalloc
+
+import sqlparse
+
+
+def _run(path, max_tokens):
+    tracemalloc.start()
+    start = time.time()
+    with io.open(path, 'r', encoding='utf-8') as f:
+        count = sum(1 for _ in sqlparse.parsestream(f, max_tokens=max_tokens))
+    secs = time.time() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return count, secs, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--max-tokens', type=int, default=1000)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix='.sql')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write('insert into audit (id, name, created) values ')
+            f.write(', '.join("({0}, 'user {0}', now())".format(i)
+                              for i in range(args.rows)))
+            f.write(';\n')
+        print('{0} rows, {1} kB'.format(
+            args.rows, os.path.getsize(path) // 1024))
+        for max_tokens in (None, args.max_tokens):
+            count, secs, peak = _run(path, max_tokens)
+            print('  max_tokens={0!s:>6}: {1:5} pieces {2:7.3f} s '
+                  '{3:9.1f} MB peak'.format(max_tokens, count, secs,
+                                            peak / 1024.0 / 1024))
+    finally:
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
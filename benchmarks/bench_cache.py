@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2009-2018 the sqlparse authors and contributors
+# <see AUTHORS file>
+#
+# This module is part of python-sqlparse and is released under
+# the BSD License: https://opensource.org/licenses/BSD-3-Clause
+
+"""parse() of a repetitive query stream with and without a cache.
+
+Usage: python benchmarks/bench_cache.py [--queries N] [--distinct N]
+           [--maxsize N]
+
+The distinct queries differ in their literals only, so they all share
+a single TemplateCache entry.
+"""
+
+from __future__ import print_function
+
+import argparse
+import random
+from collections import deque
+
+import sqlparse
+from sqlparse.engine.cache import ParseCache, TemplateCache
+
+from corpus import STATEMENT, best_of
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--distinct', type=int, default=100)
+    parser.add_argument('--maxsize', type=int, default=1024)
+    args = parser.parse_args()
+
+    rnd = random.Random(0)
+    texts = [STATEMENT.replace('1', str(i)) for i in range(args.distinct)]
+    queries = [rnd.choice(texts) for _ in range(args.queries)]
+    print('{0} queries, {1} distinct'.format(len(queries), len(texts)))
+
+    def run(cache):
+        deque((sqlparse.parse(sql, cache=cache) for sql in queries),
+              maxlen=0)
+
+    base = best_of(lambda: run(None), repeat=3)
+    print('{0:>13}: {1:7.1f} us/query'.format(
+        'no cache', base / len(queries) * 1e6))
+    for cls in [ParseCache, TemplateCache]:
+        caches = []
+
+        def run_cached():
+            # Each run starts with an empty cache.
+            caches.append(cls(args.maxsize))
+            run(caches[-1])
+
+        secs = best_of(run_cached, repeat=3)
+        print('{0:>13}: {1:7.1f} us/query  {2:5.1f}x  {3!r}'.format(
+            cls.__name__, secs / len(queries) * 1e6, base / secs,
+            caches[-1]))
+
+
+if __name__ == '__main__':
+    main()
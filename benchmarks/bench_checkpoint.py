@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2009-2018 the sqlparse authors and contributors
+# <see AUTHORS file>
+#
+# This module is part of python-sqlparse and is released under
+# the BSD License: https://opensource.org/licenses/BSD-3-Clause
+
+"""Recovery of a parsed stream from a checkpoint versus a rescan.
+
+Usage: python benchmarks/bench_checkpoint.py [--size BYTES]
+
+A file is parsed with checkpoints once. Then the time to get the
+statement behind its middle checkpoint is measured, resuming from the
+checkpoint and parsing from the start of the file.
+"""
+
+from __future__ import print_function
+
+import argparse
+import io
+import os
+import tempfile
+import time
+
+from sqlparse.engine.checkpoint import parsestream
+
+from corpus import make_sql
+
+
+def _first(path, checkpoint=None):
+    start = time.time()
+    with io.open(path, 'rb') as f:
+        next(parsestream(f, checkpoint=checkpoint))
+    return time.time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', type=int, default=256 * 1024)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix='.sql')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(make_sql(args.size).encode('utf-8'))
+        with io.open(path, 'rb') as f:
+            checkpoints = [ckpt for _, ckpt in parsestream(f)]
+        checkpoint = checkpoints[len(checkpoints) // 2]
+        print('{0} kB, {1} statements, checkpoint at byte {2}'.format(
+            args.size // 1024, len(checkpoints), checkpoint['byte_offset']))
+
+        resume = min(_first(path, checkpoint) for _ in range(5))
+        start = time.time()
+        with io.open(path, 'rb') as f:
+            for _, ckpt in parsestream(f):
+                if ckpt['offset'] > checkpoint['offset']:
+                    break
+        rescan = time.time() - start
+        print('  resume {0:8.4f} s\n  rescan {1:8.4f} s'.format(
+            resume, rescan))
+    finally:
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2009-2018 the sqlparse authors and contributors
+# <see AUTHORS file>
+#
+# This module is part of python-sqlparse and is released under
+# the BSD License: https://opensource.org/licenses/BSD-3-Clause
+
+"""Grouping with fused walks versus one walk per grouping function.
+
+Usage: python benchmarks/bench_fused.py [--size BYTES]
+
+Statements are split before each run, only grouping is timed. Both
+variants must give the same trees.
+"""
+
+from __future__ import print_function
+
+import argparse
+import gc
+import timeit
+
+from sqlparse import lexer
+from sqlparse.engine import StatementSplitter, grouping
+
+from corpus import make_sql
+
+SEQUENTIAL = [
+    grouping.group_comments,
+    grouping.group_brackets,
+    grouping.group_parenthesis,
+    grouping.group_case,
+    grouping.group_if,
+    grouping.group_for,
+    grouping.group_begin,
+    grouping.group_functions,
+    grouping.group_where,
+    grouping.group_period,
+    grouping.group_arrays,
+    grouping.group_identifier,
+    grouping.group_order,
+    grouping.group_typecasts,
+    grouping.group_operator,
+    grouping.group_comparison,
+    grouping.group_as,
+    grouping.group_aliased,
+    grouping.group_assignment,
+    grouping.align_comments,
+    grouping.group_identifier_list,
+]
+
+
+def sequential(stmt):
+    for func in SEQUENTIAL:
+        func(stmt)
+    return stmt
+
+
+def _dump(token):
+    if token.is_group:
+        return type(token), [_dump(child) for child in token.tokens]
+    return token.ttype, token.value
+
+
+def _run(stream, group):
+    return [group(stmt)
+            for stmt in StatementSplitter().process(iter(stream))]
+
+
+def _best_of(stream, group, repeat):
+    best = None
+    for _ in range(repeat):
+        stmts = list(StatementSplitter().process(iter(stream)))
+        # Like timeit, without garbage collection.
+        gc.disable()
+        try:
+            start = timeit.default_timer()
+            for stmt in stmts:
+                group(stmt)
+            secs = timeit.default_timer() - start
+        finally:
+            gc.enable()
+        best = secs if best is None else min(best, secs)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', type=int, default=64 * 1024)
+    args = parser.parse_args()
+
+    stream = list(lexer.tokenize(make_sql(args.size)))
+    assert ([_dump(stmt) for stmt in _run(stream, sequential)] ==
+            [_dump(stmt) for stmt in _run(stream, grouping.group)])
+    for name, group in [('sequential', sequential),
+                        ('fused', grouping.group)]:
+        secs = _best_of(stream, group, repeat=15)
+        print('{0:>10}: {1:6.3f} s'.format(name, secs))
+
+
+if __name__ == '__main__':
+    main()
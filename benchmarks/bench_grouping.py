@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2009-2018 the sqlparse authors and contributors
+# <see AUTHORS file>
+#
+# This module is part of python-sqlparse and is released under
+# the BSD License: https://opensource.org/licenses/BSD-3-Clause
+
+"""Statement splitting and grouping, without the lexer.
+
+Usage: python benchmarks/bench_grouping.py [--size BYTES]
+
+The token stream is lexed once up front. Token type checks are timed
+with the current implementation and with the former tuple slicing.
+"""
+
+from __future__ import print_function
+
+import argparse
+import timeit
+from collections import deque
+
+from sqlparse import lexer, tokens as T
+from sqlparse.engine import StatementSplitter, grouping
+
+from corpus import best_of, make_sql
+
+
+def _contains_by_slicing(self, item):
+    return item is not None and (self is item or item[:len(self)] == self)
+
+
+def split_and_group(stream):
+    for stmt in StatementSplitter().process(iter(stream)):
+        grouping.group(stmt)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', type=int, default=256 * 1024)
+    args = parser.parse_args()
+
+    stream = list(lexer.tokenize(make_sql(args.size)))
+    print('input: {0} tokens'.format(len(stream)))
+
+    contains = T._TokenType.__contains__
+    for name, impl in [('slicing', _contains_by_slicing),
+                       ('ancestry', contains)]:
+        T._TokenType.__contains__ = impl
+        try:
+            check = min(timeit.repeat(
+                'ttype in Keyword', number=10 ** 6, repeat=3,
+                setup='from sqlparse.tokens import Keyword, DML as ttype'))
+            split = best_of(lambda: deque(
+                StatementSplitter().process(iter(stream)), maxlen=0),
+                repeat=3)
+            group = best_of(lambda: split_and_group(stream), repeat=3)
+        finally:
+            T._TokenType.__contains__ = contains
+        print('{0:>9}: in {1:5.0f} ns  split {2:6.3f} s  '
+              'split+group {3:6.3f} s'.format(
+                  name, check * 1000, split, group))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2009-2018 the sqlparse authors and contributors
+# <see AUTHORS file>
+#
+# This module is part of python-sqlparse and is released under
+# the BSD License: https://opensource.org/licenses/BSD-3-Clause
+
+"""Start-up cost: import time and the first call to parse().
+
+Usage: python benchmarks/bench_import.py [--repeat N] [--limit MS]
+
+Each measurement runs in a fresh interpreter (``python -X importtime``,
+Python 3.7+). Bytecode is written to a temporary directory first, so
+compiling the sources doesn't count. With ``--limit`` the script fails
+if importing sqlparse takes longer than the given number of
+milliseconds.
+"""
+
+from __future__ import print_function
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+FIRST_PARSE = """\
+import time
+import sqlparse
+start = time.time()
+sqlparse.parse('select a from b where c = 1')
+print(time.time() - start)
+"""
+
+
+def run(code, env, *options):
+    cmd = [sys.executable] + list(options) + ['-c', code]
+    proc = subprocess.Popen(cmd, env=env, stdout=subprocess.PIPE,
+                            stderr=subprocess.PIPE, universal_newlines=True)
+    out, err = proc.communicate()
+    if proc.returncode:
+        raise RuntimeError(err)
+    return out, err
+
+
+def import_times(env):
+    """Returns {module: cumulative microseconds} for ``import sqlparse``."""
+    _, err = run('import sqlparse', env, '-X', 'importtime')
+    times = {}
+    for line in err.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--limit', type=float, metavar='MS')
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp()
+    env = dict(os.environ, PYTHONPYCACHEPREFIX=os.path.join(tmpdir, 'pyc'))
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    env.pop('SQLPARSE_CACHE_DIR', None)
+    try:
+        run('import sqlparse, sqlparse.keywords, sqlparse.cli', env)
+
+        best = min((import_times(env) for _ in range(args.repeat)),
+                   key=lambda times: times['sqlparse'])
+        total = best['sqlparse'] / 1000.0
+        print('import sqlparse: {0:7.1f} ms'.format(total))
+        loaded = sorted((us, name) for name, us in best.items()
+                        if name.startswith('sqlparse.'))
+        for us, name in reversed(loaded[-5:]):
+            print('  {0:<32} {1:7.1f} ms'.format(name, us / 1000.0))
+
+        cached = dict(env, SQLPARSE_CACHE_DIR=tmpdir)
+        run(FIRST_PARSE, cached)  # fills the cache
+        for name, e in [('first parse', env), ('  with cache', cached)]:
+            secs = min(float(run(FIRST_PARSE, e)[0])
+                       for _ in range(args.repeat))
+            print('{0:<16}{1:7.1f} ms'.format(name + ':', secs * 1000))
+    finally:
+        shutil.rmtree(tmpdir)
+
+    if args.limit is not None and total > args.limit:
+        sys.exit('import time {0:.1f} ms exceeds the limit of {1} ms'.format(
+            total, args.limit))
+
+
+if __name__ == '__main__':
+    main()
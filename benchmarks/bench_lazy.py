@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2009-2018 the sqlparse authors and contributors
+# <see AUTHORS file>
+#
+# This module is part of python-sqlparse and is released under
+# the BSD License: https://opensource.org/licenses/BSD-3-Clause
+
+"""Classifying statements with and without deferred grouping.
+
+Usage: python benchmarks/bench_lazy.py [--size BYTES]
+
+Times get_type() of all statements after parse() and parse(lazy=True),
+compared to lexing alone.
+"""
+
+from __future__ import print_function
+
+import argparse
+from collections import deque
+
+import sqlparse
+from sqlparse import lexer
+
+from corpus import best_of, make_sql
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', type=int, default=256 * 1024)
+    args = parser.parse_args()
+
+    sql = make_sql(args.size)
+    assert ([stmt.get_type() for stmt in sqlparse.parse(sql)] ==
+            [stmt.get_type() for stmt in sqlparse.parse(sql, lazy=True)])
+    lex = best_of(lambda: deque(lexer.tokenize(sql), maxlen=0), repeat=3)
+    print('{0:>6}: {1:6.3f} s'.format('lex', lex))
+    for name, lazy in [('eager', False), ('lazy', True)]:
+        secs = best_of(lambda: [stmt.get_type()
+                                for stmt in sqlparse.parse(sql, lazy=lazy)],
+                       repeat=3)
+        print('{0:>6}: {1:6.3f} s ({2:.1f}x lexing)'.format(
+            name, secs, secs / lex))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2009-2018 the sqlparse authors and contributors
+# <see AUTHORS file>
+#
+# This module is part of python-sqlparse and is released under
+# the BSD License: https://opensource.org/licenses/BSD-3-Clause
+
+"""Lexer throughput: combined rule table vs. trying each rule in turn.
+
+Usage: python benchmarks/bench_lexer.py [--size BYTES]
+"""
+
+from __future__ import print_function
+
+import argparse
+from collections import deque
+
+from sqlparse import lexer, tokens
+from sqlparse.keywords import SQL_REGEX
+
+from corpus import best_of, make_sql
+
+
+def tokenize_rule_by_rule(text):
+    """The lexer loop as it was before the combined rule table."""
+    pos, end = 0, len(text)
+    while pos < end:
+        for rexmatch, action in SQL_REGEX:
+            m = rexmatch(text, pos)
+            if not m:
+                continue
+            elif isinstance(action, tokens._TokenType):
+                yield action, m.group()
+            elif callable(action):
+                yield action(m.group())
+            pos = m.end()
+            break
+        else:
+            yield tokens.Error, text[pos]
+            pos += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', type=int, default=2 * 1024 * 1024)
+    args = parser.parse_args()
+
+    sql = make_sql(args.size)
+    size_mb = len(sql) / (1024.0 * 1024)
+    ntokens = sum(1 for _ in lexer.tokenize(sql))
+    print('input: {0:.1f} MB, {1} tokens'.format(size_mb, ntokens))
+
+    # Average number of rules the dispatch index leaves to try per token.
+    index = lexer.RuleTable(SQL_REGEX)._first_char_index()
+    tried = 0
+    for _, value in lexer.tokenize(sql):
+        tried += len(index.get(value[0], SQL_REGEX))
+    print('rules per token: {0:.1f} of {1}'.format(
+        float(tried) / ntokens, len(SQL_REGEX)))
+
+    for name, func in [('rule by rule', tokenize_rule_by_rule),
+                       ('combined', lexer.tokenize),
+                       ('spans', lexer.tokenize_spans)]:
+        secs = best_of(lambda: deque(func(sql), maxlen=0), repeat=3)
+        print('{0:>14}: {1:7.3f} s  {2:6.2f} MB/s'.format(
+            name, secs, size_mb / secs))
+
+
+if __name__ == '__main__':
+    main()
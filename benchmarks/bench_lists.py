@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2009-2018 the sqlparse authors and contributors
+# <see AUTHORS file>
+#
+# This module is part of python-sqlparse and is released under
+# the BSD License: https://opensource.org/licenses/BSD-3-Clause
+
+"""Parsing and reindenting statements with very long lists.
+
+Usage: python benchmarks/bench_lists.py [--max N]
+
+Times an "IN (...)" list and a SELECT list of up to N items. The time
+per item should stay about the same as the lists grow.
+"""
+
+from __future__ import print_function
+
+import argparse
+
+import sqlparse
+
+from corpus import best_of
+
+
+def in_list(count):
+    return 'select * from t where x in ({0})'.format(
+        ', '.join(str(i) for i in range(count)))
+
+
+def columns(count):
+    return 'select {0} from t'.format(
+        ', '.join('c{0}'.format(i) for i in range(count)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--max', type=int, default=20000)
+    args = parser.parse_args()
+
+    for name, make in [('in', in_list), ('columns', columns)]:
+        size = 2500
+        while size <= args.max:
+            query = make(size)
+            parse = best_of(lambda: sqlparse.parse(query), repeat=3)
+            reindent = best_of(
+                lambda: sqlparse.format(query, reindent=True), repeat=3)
+            print('{0:>8} {1:6d}: parse {2:6.3f} s ({3:4.1f} us/item)  '
+                  'reindent {4:6.3f} s ({5:4.1f} us/item)'.format(
+                      name, size, parse, parse / size * 1e6,
+                      reindent, reindent / size * 1e6))
+            size *= 2
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2009-2018 the sqlparse authors and contributors
+# <see AUTHORS file>
+#
+# This module is part of python-sqlparse and is released under
+# the BSD License: https://opensource.org/licenses/BSD-3-Clause
+
+"""Per-query overhead of format() and parse() compared to the batch API.
+
+Usage: python benchmarks/bench_many.py [--queries N] [--workers N]
+
+Many short queries, as found in query logs, are formatted and parsed
+one call at a time and with format_many() / parse_many(). The cost of
+validating the options and building the filter stack, which the batch
+API pays once, is timed on its own.
+"""
+
+from __future__ import print_function
+
+import argparse
+from collections import deque
+
+import sqlparse
+from sqlparse import formatter
+from sqlparse.engine import batch
+
+from corpus import best_of
+
+QUERY = u'select id, name from users where id = {0} order by name'
+OPTIONS = {'keyword_case': 'upper', 'strip_whitespace': True}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--queries', type=int, default=20000)
+    parser.add_argument('--workers', type=int, default=0,
+                        help='also time a pool of N worker processes')
+    args = parser.parse_args()
+
+    queries = [QUERY.format(i) for i in range(args.queries)]
+    print('{0} queries of {1} characters'.format(
+        len(queries), len(queries[0])))
+
+    def consume(iterable):
+        deque(iterable, maxlen=0)
+
+    timings = [
+        ('setup per format()', lambda: consume(
+            batch.format_pipeline(formatter.validate_options(dict(OPTIONS)))
+            for _ in queries)),
+        ('setup per parse()', lambda: consume(
+            batch.parse_pipeline() for _ in queries)),
+        ('format()', lambda: consume(
+            sqlparse.format(sql, **OPTIONS) for sql in queries)),
+        ('format_many()', lambda: consume(
+            sqlparse.format_many(queries, **OPTIONS))),
+        ('parse()', lambda: consume(
+            sqlparse.parse(sql) for sql in queries)),
+        ('parse_many()', lambda: consume(sqlparse.parse_many(queries))),
+    ]
+    if args.workers:
+        timings += [
+            ('format_many(workers={0})'.format(args.workers),
+             lambda: consume(sqlparse.format_many(
+                 queries, workers=args.workers, **OPTIONS))),
+            ('parse_many(workers={0})'.format(args.workers),
+             lambda: consume(sqlparse.parse_many(
+                 queries, workers=args.workers))),
+        ]
+
+    results = {}
+    for name, func in timings:
+        results[name] = best_of(func, repeat=3) / len(queries) * 1e6
+        print('{0:>24}: {1:8.1f} us/query'.format(name, results[name]))
+    for name in ['format()', 'parse()']:
+        print('{0:>24}: {1:8.1%} of a call'.format(
+            'setup per ' + name,
+            results['setup per ' + name] / results[name]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2009-2018 the sqlparse authors and contributors
+# <see AUTHORS file>
+#
+# This module is part of python-sqlparse and is released under
+# the BSD License: https://opensource.org/licenses/BSD-3-Clause
+
+"""Grouping of brackets, parenthesis and blocks in one walk versus six.
+
+Usage: python benchmarks/bench_matching.py [--size BYTES] [--depth N]
+
+Statements are split before each run, only the matching is timed. With
+--depth the corpus is followed by queries nesting CASE and parenthesis
+N levels deep. Both variants must give the same trees.
+"""
+
+from __future__ import print_function
+
+import argparse
+import gc
+import timeit
+
+from sqlparse import lexer
+from sqlparse.engine import StatementSplitter, grouping
+
+from corpus import make_sql
+
+SEQUENTIAL = [
+    grouping.group_brackets,
+    grouping.group_parenthesis,
+    grouping.group_case,
+    grouping.group_if,
+    grouping.group_for,
+    grouping.group_begin,
+]
+
+
+def sequential(stmt):
+    for func in SEQUENTIAL:
+        func(stmt)
+    return stmt
+
+
+def single(stmt):
+    grouping.group_matching(stmt)
+    return stmt
+
+
+def nested(depth):
+    expr = 'x[1]'
+    for level in range(depth):
+        expr = 'case when f(a{0}) then ({1}) else b end'.format(level, expr)
+    return 'select {0} from t;\n'.format(expr)
+
+
+def _dump(token):
+    if token.is_group:
+        return type(token), [_dump(child) for child in token.tokens]
+    return token.ttype, token.value
+
+
+def _run(stream, group):
+    return [group(stmt)
+            for stmt in StatementSplitter().process(iter(stream))]
+
+
+def _best_of(stream, group, repeat):
+    best = None
+    for _ in range(repeat):
+        stmts = list(StatementSplitter().process(iter(stream)))
+        # Like timeit, without garbage collection.
+        gc.disable()
+        try:
+            start = timeit.default_timer()
+            for stmt in stmts:
+                group(stmt)
+            secs = timeit.default_timer() - start
+        finally:
+            gc.enable()
+        best = secs if best is None else min(best, secs)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', type=int, default=64 * 1024)
+    parser.add_argument('--depth', type=int, default=0)
+    args = parser.parse_args()
+
+    sql = make_sql(args.size)
+    if args.depth:
+        sql += nested(args.depth) * 20
+    stream = list(lexer.tokenize(sql))
+    assert ([_dump(stmt) for stmt in _run(stream, sequential)] ==
+            [_dump(stmt) for stmt in _run(stream, single)])
+    for name, group in [('six walks', sequential), ('one walk', single)]:
+        secs = _best_of(stream, group, repeat=15)
+        print('{0:>10}: {1:6.3f} s'.format(name, secs))
+
+
+if __name__ == '__main__':
+    main()
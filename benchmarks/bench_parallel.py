@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2009-2018 the sqlparse authors and contributors
+# <see AUTHORS file>
+#
+# This module is part of python-sqlparse and is released under
+# the BSD License: https://opensource.org/licenses/BSD-3-Clause
+
+"""Scaling of parse_parallel() with the number of worker processes.
+
+Usage: python benchmarks/bench_parallel.py [--sizes BYTES,...]
+           [--workers N,...] [--chunk-size N]
+
+The pools are started before timing. Sequential parse() is the
+baseline.
+"""
+
+from __future__ import print_function
+
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import sqlparse
+from sqlparse.engine import parallel
+
+from corpus import best_of, make_sql
+
+
+def _ints(value):
+    return [int(item) for item in value.split(',')]
+
+
+def main():
+    ncpu = multiprocessing.cpu_count()
+    workers = sorted(set([1, 2, 4, 8, 16, 32, ncpu]))
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=_ints, default=[1024 * 1024])
+    parser.add_argument('--workers', type=_ints,
+                        default=[n for n in workers if n <= ncpu])
+    parser.add_argument('--chunk-size', type=int,
+                        default=parallel.CHUNK_SIZE)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    print('{0} CPUs, chunk size {1}'.format(ncpu, args.chunk_size))
+
+    for size in args.sizes:
+        sql = make_sql(size)
+        size_mb = len(sql) / (1024.0 * 1024)
+        nstmts = len(sqlparse.split(sql))
+        base = best_of(lambda: sqlparse.parse(sql), repeat=args.repeat)
+        print('{0:.1f} MB, {1} statements: parse() {2:.3f} s'.format(
+            size_mb, nstmts, base))
+        for n in args.workers:
+            executor = ProcessPoolExecutor(n)
+            try:
+                list(executor.map(abs, range(n)))  # start the workers
+                secs = best_of(lambda: parallel.parse_parallel(
+                    sql, workers=n, chunk_size=args.chunk_size,
+                    executor=executor), repeat=args.repeat)
+            finally:
+                executor.shutdown()
+            print('  {0:>3} workers: {1:7.3f} s  {2:5.2f}x'.format(
+                n, secs, base / secs))
+
+
+if __name__ == '__main__':
+    main()
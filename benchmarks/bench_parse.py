@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2009-2018 the sqlparse authors and contributors
+# <see AUTHORS file>
+#
+# This module is part of python-sqlparse and is released under
+# the BSD License: https://opensource.org/licenses/BSD-3-Clause
+
+"""End-to-end parsing of reindented SQL, with and without whitespace
+coalescing.
+
+Usage: python benchmarks/bench_parse.py [--size BYTES]
+"""
+
+from __future__ import print_function
+
+import argparse
+
+import sqlparse
+
+from corpus import best_of, make_sql
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', type=int, default=256 * 1024)
+    args = parser.parse_args()
+
+    sql = sqlparse.format(make_sql(args.size), reindent=True)
+    size_mb = len(sql) / (1024.0 * 1024)
+    print('input: {0:.2f} MB reindented'.format(size_mb))
+
+    for name, coalesce in [('default', False), ('coalesced', True)]:
+        stmts = sqlparse.parse(sql, coalesce_whitespace=coalesce)
+        ntokens = sum(1 for stmt in stmts for _ in stmt.flatten())
+        secs = best_of(
+            lambda: sqlparse.parse(sql, coalesce_whitespace=coalesce),
+            repeat=3)
+        print('{0:>10}: {1:8} tokens  {2:7.3f} s  {3:6.2f} MB/s'.format(
+            name, ntokens, secs, size_mb / secs))
+
+
+if __name__ == '__main__':
+    main()
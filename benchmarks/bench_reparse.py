@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2009-2018 the sqlparse authors and contributors
+# <see AUTHORS file>
+#
+# This module is part of python-sqlparse and is released under
+# the BSD License: https://opensource.org/licenses/BSD-3-Clause
+
+"""Latency of reparse() after typing a character, by file size.
+
+Usage: python benchmarks/bench_reparse.py [--sizes BYTES,...]
+
+A character is inserted in the middle of the text. The first reparse()
+of a parse result checks the statements in front of the edit for
+unclosed strings and comments, it's timed separately.
+"""
+
+from __future__ import print_function
+
+import argparse
+import time
+
+import sqlparse
+
+from corpus import best_of, make_sql
+
+
+def _ints(value):
+    return [int(item) for item in value.split(',')]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=_ints,
+                        default=[16 * 1024, 64 * 1024, 256 * 1024])
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        sql = make_sql(size)
+        offset = len(sql) // 2
+        secs = best_of(lambda: sqlparse.parse(sql), repeat=1)
+        stmts = sqlparse.parse(sql)
+        start = time.time()
+        stmts = sqlparse.reparse(stmts, offset, 0, u'x')
+        first = time.time() - start
+        edit = best_of(lambda: sqlparse.reparse(stmts, offset, 0, u'x'),
+                       repeat=5)
+        print('{0:>4} kB: parse {1:7.3f} s  first reparse {2:7.4f} s  '
+              'reparse {3:7.4f} s'.format(
+                  len(sql) // 1024, secs, first, edit))
+
+
+if __name__ == '__main__':
+    main()
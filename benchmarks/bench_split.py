@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2009-2018 the sqlparse authors and contributors
+# <see AUTHORS file>
+#
+# This module is part of python-sqlparse and is released under
+# the BSD License: https://opensource.org/licenses/BSD-3-Clause
+
+"""sqlparse.split() compared to splitting into Statement objects.
+
+Usage: python benchmarks/bench_split.py [--size BYTES]
+"""
+
+from __future__ import print_function
+
+import argparse
+from collections import deque
+
+import sqlparse
+from sqlparse.compat import text_type
+
+from corpus import best_of, make_sql
+
+
+def split_statements(sql):
+    """sqlparse.split() as it was before the token-free path."""
+    stack = sqlparse.engine.FilterStack()
+    return [text_type(stmt).strip() for stmt in stack.run(sql)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', type=int, default=2 * 1024 * 1024)
+    args = parser.parse_args()
+
+    sql = make_sql(args.size)
+    size_mb = len(sql) / (1024.0 * 1024)
+    assert split_statements(sql) == sqlparse.split(sql)
+    print('input: {0:.1f} MB, {1} statements'.format(
+        size_mb, len(sqlparse.split(sql))))
+
+    spans = lambda sql: deque(sqlparse.split_spans(sql), maxlen=0)
+    for name, func in [('statements', split_statements),
+                       ('split', sqlparse.split),
+                       ('split_spans', spans)]:
+        secs = best_of(lambda: func(sql), repeat=3)
+        print('{0:>12}: {1:7.3f} s  {2:6.2f} MB/s'.format(
+            name, secs, size_mb / secs))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2009-2018 the sqlparse authors and contributors
+# <see AUTHORS file>
+#
+# This module is part of python-sqlparse and is released under
+# the BSD License: https://opensource.org/licenses/BSD-3-Clause
+
+"""Parse time with lazy group values versus values joined eagerly.
+
+Usage: python benchmarks/bench_values.py [--max N]
+
+Queries nest parenthesis and CASE expressions up to N levels deep or
+select up to N columns. Eager values are emulated by computing the value
+of each group when it's created or extended, as before.
+"""
+
+from __future__ import print_function
+
+import argparse
+
+import sqlparse
+from sqlparse import sql
+
+from corpus import best_of
+
+
+def nested(depth):
+    expr = 'x'
+    for level in range(depth):
+        expr = 'case when (a{0} > {1}) then b else c end'.format(level, expr)
+    return 'select {0} from t'.format(expr)
+
+
+def columns(count):
+    return 'select {0} from t'.format(
+        ', '.join('t.c{0} as a{0}'.format(i) for i in range(count)))
+
+
+_init = sql.TokenList.__init__
+_forget_value = sql.TokenList._forget_value
+
+
+def _eager_init(self, tokens=None):
+    _init(self, tokens)
+    self.value
+
+
+def _eager_forget_value(self, parents=True):
+    _forget_value(self, parents)
+    self.value
+
+
+def _time(query, eager):
+    if eager:
+        sql.TokenList.__init__ = _eager_init
+        sql.TokenList._forget_value = _eager_forget_value
+    try:
+        return best_of(lambda: sqlparse.parse(query), repeat=5)
+    finally:
+        sql.TokenList.__init__ = _init
+        sql.TokenList._forget_value = _forget_value
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--max', type=int, default=800)
+    args = parser.parse_args()
+
+    for name, make in [('depth', nested), ('columns', columns)]:
+        size = 25
+        while size <= args.max:
+            query = make(size)
+            assert (str(sqlparse.parse(query)[0]) == query)
+            eager, lazy = _time(query, True), _time(query, False)
+            print('{0:>8} {1:4d}: eager {2:7.4f} s  lazy {3:7.4f} s'
+                  .format(name, size, eager, lazy))
+            size *= 2
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2009-2018 the sqlparse authors and contributors
+# <see AUTHORS file>
+#
+# This module is part of python-sqlparse and is released under
+# the BSD License: https://opensource.org/licenses/BSD-3-Clause
+
+"""Synthetic SQL used by the benchmark scripts."""
+
+import os
+import timeit
+
+FILES_DIR = os.path.join(os.path.dirname(__file__), '..', 'tests', 'files')
+
+STATEMENT = u"""\
+-- daily rollup
+SELECT
+    t.user_id,
+    SAFE_CAST(t.amount AS NUMERIC) AS amount,
+    COUNT(DISTINCT s.session_id) AS sessions,  /* distinct */
+    CASE WHEN t.country IN ('DE', 'AT', 'CH') THEN 'dach'
+         ELSE LOWER(t.country) END AS region
+FROM `project.dataset.transactions` t
+LEFT OUTER JOIN project.dataset.sessions s ON s.user_id = t.user_id
+WHERE t.created_at >= TIMESTAMP('2018-01-01 00:00:00')
+  AND t.amount > 10.5 AND t.note != "it's"
+GROUP BY 1, 2, 4
+ORDER BY amount DESC
+LIMIT 100;
+"""
+
+
+def make_sql(size):
+    """Returns a script of roughly *size* characters."""
+    count = max(1, size // len(STATEMENT))
+    return STATEMENT * count
+
+
+def load_file(filename):
+    with open(os.path.join(FILES_DIR, filename)) as f:
+        return f.read()
+
+
+def best_of(func, repeat=5, number=1):
+    """Returns the best wall time of *func* in seconds."""
+    return min(timeit.repeat(func, repeat=repeat, number=number)) / number
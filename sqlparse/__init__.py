@@ -8,65 +8,193 @@
 
 """Parse SQL statements."""
 
+import sys
+
 # Setup namespace
 from sqlparse import sql
-from sqlparse import cli
 from sqlparse import engine
+from sqlparse import lexer
 from sqlparse import tokens
-from sqlparse import filters
-from sqlparse import formatter
 
 from sqlparse.compat import text_type
 
 __version__ = '0.2.5.dev0'
 __all__ = ['engine', 'filters', 'formatter', 'sql', 'tokens', 'cli']
 
-
-def parse(sql, encoding=None):
+# Only needed for formatting and the command line, these are imported
+# on first access where the interpreter supports it (PEP 562).
+_LAZY_MODULES = ('cli', 'filters', 'formatter')
+
+if sys.version_info >= (3, 7):
+    def __getattr__(name):
+        if name in _LAZY_MODULES:
+            import importlib
+            return importlib.import_module('sqlparse.' + name)
+        raise AttributeError(
+            "module 'sqlparse' has no attribute '{0}'".format(name))
+else:
+    from sqlparse import cli
+    from sqlparse import filters
+    from sqlparse import formatter
+
+
+def parse(sql, encoding=None, dialect=None, coalesce_whitespace=False,
+          cache=None, lazy=False):
     """Parse sql and return a list of statements.
 
     :param sql: A string containing one or more SQL statements.
     :param encoding: The encoding of the statement (optional).
+    :param dialect: Name of the SQL dialect (optional), see
+      :mod:`sqlparse.dialects`.
+    :param coalesce_whitespace: If true, each run of spaces and tabs
+      becomes a single token (optional).
+    :param cache: A :class:`~sqlparse.engine.cache.ParseCache` that
+      keeps the statements of repeated queries (optional).
+    :param lazy: If true, statements are grouped on first use, see
+      :class:`~sqlparse.sql.LazyStatement` (optional). Statements from
+      a *cache* are always grouped.
     :returns: A tuple of :class:`~sqlparse.sql.Statement` instances.
     """
-    return tuple(parsestream(sql, encoding))
+    if cache is not None:
+        return cache.parse(sql, encoding, dialect, coalesce_whitespace)
+    return tuple(parsestream(sql, encoding, dialect, coalesce_whitespace,
+                             lazy=lazy))
+
+
+def parse_parallel(sql, encoding=None, **options):
+    """Parse sql in a pool of worker processes.
+
+    Returns the same statements as :func:`parse`, the options (number
+    of workers, chunk size, ...) are described in
+    :func:`sqlparse.engine.parallel.parse_parallel`.
+    """
+    from sqlparse.engine.parallel import parse_parallel
+    return parse_parallel(sql, encoding, **options)
+
+
+def parse_many(queries, encoding=None, **options):
+    """Parse each of many independent queries.
+
+    The filter stack is built once and reused for all queries. The
+    options (dialect, worker pool, ...) are described in
+    :func:`sqlparse.engine.batch.parse_many`.
+
+    :returns: A generator yielding a tuple of
+      :class:`~sqlparse.sql.Statement` instances per query.
+    """
+    from sqlparse.engine.batch import parse_many
+    return parse_many(queries, encoding, **options)
+
+
+def reparse(statements, offset, deleted, inserted, **options):
+    """Parse sql again after an edit.
+
+    :param statements: The statements of the text before the edit, as
+      returned by :func:`parse`.
+    :param offset: The position of the edit in the text.
+    :param deleted: The number of characters removed at *offset*.
+    :param inserted: The string inserted at *offset*.
+    :returns: A tuple of :class:`~sqlparse.sql.Statement` instances
+      like :func:`parse` returns for the edited text. Statements that
+      aren't affected by the edit are reused.
+
+    The options (dialect, ...) have to match those of the original
+    :func:`parse` call, see :func:`sqlparse.engine.incremental.reparse`.
+    """
+    from sqlparse.engine.incremental import reparse
+    return reparse(statements, offset, deleted, inserted, **options)
 
 
-def parsestream(stream, encoding=None):
+def parsestream(stream, encoding=None, dialect=None,
+                coalesce_whitespace=False, max_tokens=None, lazy=False):
     """Parses sql statements from file-like object.
 
+    The stream is read in chunks, statements are yielded as soon as
+    they are complete.
+
     :param stream: A file-like object.
     :param encoding: The encoding of the stream contents (optional).
+    :param dialect: Name of the SQL dialect (optional).
+    :param coalesce_whitespace: If true, each run of spaces and tabs
+      becomes a single token (optional).
+    :param max_tokens: Upper limit for the tokens of a statement held
+      in memory (optional). Longer statements are yielded in pieces,
+      see :class:`~sqlparse.sql.StatementFragment`.
+    :param lazy: If true, statements are grouped on first use, see
+      :class:`~sqlparse.sql.LazyStatement` (optional).
     :returns: A generator of :class:`~sqlparse.sql.Statement` instances.
     """
-    stack = engine.FilterStack()
-    stack.enable_grouping()
+    stack = engine.FilterStack(dialect, coalesce_whitespace, max_tokens)
+    stack.enable_grouping(lazy)
     return stack.run(stream, encoding)
 
 
-def format(sql, encoding=None, **options):
+def format(sql, encoding=None, dialect=None, coalesce_whitespace=False,
+           **options):
     """Format *sql* according to *options*.
 
     Available options are documented in :ref:`formatting`.
 
     In addition to the formatting options this function accepts the
-    keyword "encoding" which determines the encoding of the statement.
+    keywords "encoding" which determines the encoding of the statement,
+    "dialect" which selects the SQL dialect and "coalesce_whitespace"
+    (see :func:`parse`). The latter doesn't change the result.
 
     :returns: The formatted SQL statement as string.
     """
-    stack = engine.FilterStack()
+    from sqlparse import filters, formatter
+
+    stack = engine.FilterStack(dialect, coalesce_whitespace)
     options = formatter.validate_options(options)
     stack = formatter.build_filter_stack(stack, options)
     stack.postprocess.append(filters.SerializerUnicode())
     return u''.join(stack.run(sql, encoding))
 
 
-def split(sql, encoding=None):
+def format_many(queries, encoding=None, **options):
+    """Format each of many independent queries.
+
+    Accepts the options of :func:`format`, which are validated once.
+    Queries can also be formatted in a pool of worker processes, see
+    :func:`sqlparse.engine.batch.format_many`.
+
+    :returns: A generator of formatted queries.
+    """
+    from sqlparse.engine.batch import format_many
+    return format_many(queries, encoding, **options)
+
+
+def split(sql, encoding=None, dialect=None):
     """Split *sql* into single statements.
 
     :param sql: A string containing one or more SQL statements.
     :param encoding: The encoding of the statement (optional).
+    :param dialect: Name of the SQL dialect (optional).
     :returns: A list of strings.
     """
-    stack = engine.FilterStack()
-    return [text_type(stmt).strip() for stmt in stack.run(sql, encoding)]
+    # Whitespace runs and keywords are all the splitter looks at.
+    stream = lexer.tokenize(sql, encoding, dialect, coalesce_whitespace=True)
+    return [stmt.strip() for stmt in engine.StatementSplitter().split(stream)]
+
+
+def split_spans(sql, encoding=None, dialect=None):
+    """Split *sql* into single statements and return their offsets.
+
+    Nothing is copied, each statement is ``sql[start:end]``. Stripped
+    of surrounding whitespace, these are the statements returned by
+    :func:`split`.
+
+    :param sql: A string or a bytes-like object, e.g. an ``mmap``.
+    :param encoding: The encoding of bytes input (default: utf-8).
+    :param dialect: Name of the SQL dialect (optional).
+    :returns: A generator of ``(start, end)`` tuples, character offsets
+      for strings and byte offsets for bytes input.
+    """
+    splitter = engine.StatementSplitter()
+    if isinstance(sql, text_type):
+        stream = lexer.tokenize_spans(sql, dialect, coalesce_whitespace=True)
+        return splitter.split_spans(stream, sql)
+    encoding = encoding or 'utf-8'
+    stream = lexer.tokenize_buffer(sql, encoding, dialect=dialect,
+                                   coalesce_whitespace=True)
+    return splitter.split_spans(stream, sql, encoding)
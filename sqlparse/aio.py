@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2009-2018 the sqlparse authors and contributors
+# <see AUTHORS file>
+#
+# This module is part of python-sqlparse and is released under
+# the BSD License: https://opensource.org/licenses/BSD-3-Clause
+
+"""Parsing of asynchronous streams (Python 3.6+)::
+
+    async for stmt in sqlparse.aio.parsestream(reader):
+        ...
+
+Lexing and splitting are done on the event loop, one chunk at a time.
+Grouping, which takes most of the time, runs in an executor.
+"""
+
+import asyncio
+import codecs
+from collections import deque
+
+from sqlparse import lexer
+from sqlparse.engine import grouping
+from sqlparse.engine.filter_stack import FilterStack
+from sqlparse.engine.statement_splitter import StatementSplitter
+
+#: Default number of statements grouped in the executor at once.
+MAX_PENDING = 4
+
+
+async def _read(stream, chunk_size):
+    if hasattr(stream, 'read'):
+        while True:
+            chunk = await stream.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    else:
+        async for chunk in stream:
+            yield chunk
+
+
+async def parsestream(stream, encoding=None, dialect=None,
+                      coalesce_whitespace=False, executor=None,
+                      max_pending=MAX_PENDING, chunk_size=lexer.CHUNK_SIZE):
+    """Parses sql statements from an asynchronous stream.
+
+    :param stream: An :class:`asyncio.StreamReader` (or any object with
+      a ``read`` coroutine) or an asynchronous iterable of strings or
+      bytes.
+    :param encoding: The encoding of bytes chunks (default: utf-8).
+    :param dialect: Name of the SQL dialect (optional).
+    :param coalesce_whitespace: See :func:`sqlparse.parse` (optional).
+    :param executor: The :class:`concurrent.futures.Executor` grouping
+      the statements (default: the executor of the event loop).
+    :param max_pending: The number of statements in the executor at
+      most. No more is read from *stream* until the first of them has
+      been consumed.
+    :param chunk_size: The size of reads from a stream reader.
+    :returns: An asynchronous generator of
+      :class:`~sqlparse.sql.Statement` instances, in input order.
+    """
+    loop = asyncio.get_event_loop()
+    stack = FilterStack(dialect, coalesce_whitespace)
+    lex = lexer.IncrementalLexer(
+        lexer.get_rules(stack.dialect, coalesce_whitespace))
+    splitter = StatementSplitter()
+    decoder = None
+    pending = deque()
+
+    chunks = _read(stream, chunk_size)
+    read = None
+    final = False
+    try:
+        while not final:
+            if read is None:
+                read = asyncio.ensure_future(chunks.__anext__())
+            if pending and not read.done():
+                # Yield grouped statements while waiting for input.
+                await asyncio.wait([read, pending[0]],
+                                   return_when=asyncio.FIRST_COMPLETED)
+                if pending[0].done():
+                    yield pending.popleft().result()
+                    continue
+            try:
+                chunk = await read
+            except StopAsyncIteration:
+                chunk, final = u'', True
+                if decoder is not None:
+                    chunk = decoder.decode(b'', True)
+            else:
+                if isinstance(chunk, (bytes, bytearray, memoryview)):
+                    if decoder is None:
+                        decoder = codecs.getincrementaldecoder(
+                            encoding or 'utf-8')()
+                    chunk = decoder.decode(chunk)
+            read = None
+
+            for stmt in splitter.feed(lex.feed(chunk, final), final):
+                if len(pending) >= max_pending:
+                    yield await pending.popleft()
+                pending.append(
+                    loop.run_in_executor(executor, grouping.group, stmt))
+
+        while pending:
+            yield await pending.popleft()
+    finally:
+        if read is not None:
+            read.cancel()
+        for future in pending:
+            future.cancel()
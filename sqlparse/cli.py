@@ -21,6 +21,7 @@ Why does this file exist, and why not put this in __main__?
 """
 
 import argparse
+import io
 import sys
 from io import TextIOWrapper
 from codecs import open, getreader
@@ -165,15 +166,11 @@ def main(args=None):
         if PY2:
             data = getreader(args.encoding)(sys.stdin).read()
         else:
-            wrapper = TextIOWrapper(sys.stdin.buffer, encoding=args.encoding)
-            try:
-                data = wrapper.read()
-            finally:
-                wrapper.detach()
+            data = TextIOWrapper(sys.stdin.buffer, encoding=args.encoding)
     else:
         try:
-            with open(args.filename, 'r', args.encoding) as f:
-                data = ''.join(f.readlines())
+            data = io.open(args.filename, 'r', encoding=args.encoding,
+                           newline='')
         except IOError as e:
             return _error(
                 u'Failed to read {0}: {1}'.format(args.filename, e))
@@ -184,6 +181,7 @@ def main(args=None):
             stream = open(args.outfile, 'w', args.encoding)
             close_stream = True
         except IOError as e:
+            _close_input(args, data)
             return _error(u'Failed to open {0}: {1}'.format(args.outfile, e))
     else:
         stream = sys.stdout
@@ -192,11 +190,26 @@ def main(args=None):
     try:
         formatter_opts = sqlparse.formatter.validate_options(formatter_opts)
     except SQLParseError as e:
+        _close_input(args, data)
         return _error(u'Invalid options: {0}'.format(e))
 
-    s = sqlparse.format(data, **formatter_opts)
-    stream.write(s)
+    # The input is lexed in chunks and written out statement by statement.
+    stack = sqlparse.formatter.build_filter_stack(
+        sqlparse.engine.FilterStack(), formatter_opts)
+    stack.postprocess.append(sqlparse.filters.SerializerUnicode())
+    try:
+        for stmt in stack.run(data):
+            stream.write(stmt)
+    finally:
+        _close_input(args, data)
     stream.flush()
     if close_stream:
         stream.close()
     return 0
+
+
+def _close_input(args, data):
+    if args.filename != '-':
+        data.close()
+    elif not PY2:
+        data.detach()  # leave sys.stdin open
@@ -19,6 +19,12 @@ https://bitbucket.org/gutworth/six
 import sys
 from io import TextIOBase
 
+try:
+    from re import _constants as sre_constants, _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_constants
+    import sre_parse
+
 PY2 = sys.version_info[0] == 2
 PY3 = sys.version_info[0] == 3
 
@@ -29,6 +35,7 @@ if PY3:
 
     bytes_type = bytes
     text_type = str
+    unichr = chr
     string_types = (str,)
     from io import StringIO
     file_types = (StringIO, TextIOBase)
@@ -42,6 +49,7 @@ elif PY2:
 
     bytes_type = str
     text_type = unicode
+    unichr = unichr
     string_types = (str, unicode,)
     from StringIO import StringIO
     file_types = (file, StringIO, TextIOBase)
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2009-2018 the sqlparse authors and contributors
+# <see AUTHORS file>
+#
+# This module is part of python-sqlparse and is released under
+# the BSD License: https://opensource.org/licenses/BSD-3-Clause
+
+"""SQL dialects.
+
+A dialect bundles the keyword tables of a database with a lexer rule
+table that uses them. Dialects are registered by name and can be passed
+to :func:`sqlparse.parse` and friends::
+
+    sqlparse.parse(sql, dialect='oracle')
+
+Without a dialect the tables selected by ``keywords.DB`` are used.
+"""
+
+import functools
+import threading
+
+from sqlparse.exceptions import SQLParseError
+
+_REGISTRY = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+class Dialect(object):
+    """A named set of keyword tables.
+
+    *tables* is a callable returning the keyword tables in order of
+    precedence, *rules* defaults to ``keywords.SQL_REGEX``. Both are
+    only evaluated when the dialect is used for the first time. Rules
+    whose action is :func:`keywords.is_keyword` look up words in the
+    tables of this dialect instead.
+    """
+
+    def __init__(self, name, tables, rules=None):
+        self.name = name
+        self._tables = tables
+        self._rules = rules
+        self._lookup = None
+        self._rule_tables = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return '<{0} {1!r} at 0x{2:X}>'.format(
+            self.__class__.__name__, self.name, id(self))
+
+    @property
+    def lookup(self):
+        """Function mapping a word to a ``(tokentype, word)`` pair."""
+        if self._lookup is None:
+            from sqlparse import keywords
+            with self._lock:
+                if self._lookup is None:
+                    merged = keywords.merge_keywords(self._tables())
+                    self._lookup = functools.partial(
+                        keywords.lookup_keyword, merged, {})
+        return self._lookup
+
+    def is_keyword(self, value):
+        return self.lookup(value)
+
+    @property
+    def rules(self):
+        """The compiled :class:`~sqlparse.lexer.RuleTable`."""
+        return self.get_rules()
+
+    def get_rules(self, coalesce_whitespace=False):
+        """Returns the compiled :class:`~sqlparse.lexer.RuleTable`, see
+        :func:`sqlparse.lexer.get_rules`."""
+        try:
+            return self._rule_tables[coalesce_whitespace]
+        except KeyError:
+            pass
+        from sqlparse import keywords, lexer
+        lookup = self.lookup
+        with self._lock:
+            if coalesce_whitespace not in self._rule_tables:
+                rules = [(rexmatch, lookup
+                          if action is keywords.is_keyword else action)
+                         for rexmatch, action
+                         in self._rules or keywords.SQL_REGEX]
+                if coalesce_whitespace:
+                    rules = lexer._coalesce_whitespace(rules)
+                self._rule_tables[coalesce_whitespace] = lexer.RuleTable(
+                    rules, cache_dir=lexer.CACHE_DIR)
+        return self._rule_tables[coalesce_whitespace]
+
+
+def register_dialect(dialect):
+    """Registers *dialect* under its (case-insensitive) name."""
+    with _REGISTRY_LOCK:
+        _REGISTRY[dialect.name.lower()] = dialect
+    return dialect
+
+
+def get_dialect(dialect):
+    """Returns the registered dialect called *dialect*.
+
+    :class:`Dialect` instances are returned as they are.
+    """
+    if isinstance(dialect, Dialect):
+        return dialect
+    try:
+        return _REGISTRY[dialect.lower()]
+    except (KeyError, AttributeError):
+        raise SQLParseError('Unknown dialect: {0!r}'.format(dialect))
+
+
+def _tables(db):
+    def tables():
+        from sqlparse import keywords
+        return keywords._keyword_tables(db)
+    return tables
+
+
+register_dialect(Dialect('bigquery', _tables('BIGQUERY')))
+register_dialect(Dialect('oracle', _tables('ORACLE')))
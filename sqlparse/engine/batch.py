@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2009-2018 the sqlparse authors and contributors
+# <see AUTHORS file>
+#
+# This module is part of python-sqlparse and is released under
+# the BSD License: https://opensource.org/licenses/BSD-3-Clause
+
+"""Parsing and formatting of many independent queries.
+
+The options are validated and the filter stack is built once per batch
+(or once per chunk in a worker process) instead of once per query.
+Worker processes need the :mod:`concurrent.futures` backport (``futures``
+on PyPI) on Python 2.
+"""
+
+import itertools
+import pickle
+from collections import deque
+
+from sqlparse.dialects import get_dialect
+from sqlparse.engine.filter_stack import FilterStack
+
+#: Default number of queries handed to a worker at once.
+CHUNK_SIZE = 64
+
+
+class Pipeline(object):
+    """A prepared :class:`FilterStack` that is reused for many queries.
+
+    Filters keep state between the statements of a query (the reindent
+    filter separates statements by blank lines, the output filters
+    number their variables). Their attributes are therefore restored to
+    the values they had when the pipeline was created before each query
+    is run, so every query is processed as by a fresh stack.
+    """
+
+    def __init__(self, stack):
+        self.stack = stack
+        self._state = [(filter_, dict(vars(filter_))) for filter_ in
+                       stack.preprocess + stack.stmtprocess +
+                       stack.postprocess]
+
+    def run(self, sql, encoding=None):
+        for filter_, state in self._state:
+            filter_.__dict__.update(state)
+        return self.stack.run(sql, encoding)
+
+
+def parse_pipeline(dialect=None, coalesce_whitespace=False):
+    stack = FilterStack(dialect, coalesce_whitespace)
+    stack.enable_grouping()
+    return Pipeline(stack)
+
+
+def format_pipeline(options, dialect=None, coalesce_whitespace=False):
+    """*options* have to be validated by
+    :func:`~sqlparse.formatter.validate_options`."""
+    from sqlparse import filters, formatter
+
+    stack = FilterStack(dialect, coalesce_whitespace)
+    stack = formatter.build_filter_stack(stack, options)
+    stack.postprocess.append(filters.SerializerUnicode())
+    return Pipeline(stack)
+
+
+def _parse_chunk(queries, encoding, dialect, coalesce_whitespace):
+    pipeline = parse_pipeline(dialect, coalesce_whitespace)
+    return pickle.dumps([tuple(pipeline.run(sql, encoding))
+                         for sql in queries], pickle.HIGHEST_PROTOCOL)
+
+
+def _format_chunk(queries, encoding, dialect, coalesce_whitespace, options):
+    pipeline = format_pipeline(options, dialect, coalesce_whitespace)
+    return [u''.join(pipeline.run(sql, encoding)) for sql in queries]
+
+
+def _fan_out(func, queries, args, workers, executor, chunk_size):
+    """Yields ``func(chunk, *args)`` for chunks of *queries* in input
+    order.
+
+    At most two chunks per worker are submitted ahead of the consumer,
+    so *queries* can be an endless iterator.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = workers or multiprocessing.cpu_count()
+    own_executor = executor is None
+    if own_executor:
+        executor = ProcessPoolExecutor(workers)
+    try:
+        queries = iter(queries)
+        pending = deque()
+        while True:
+            while len(pending) < 2 * workers:
+                chunk = list(itertools.islice(queries, chunk_size))
+                if not chunk:
+                    break
+                pending.append(executor.submit(func, chunk, *args))
+            if not pending:
+                break
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+        if own_executor:
+            executor.shutdown()
+
+
+def _parse_many(queries, encoding, dialect, coalesce_whitespace,
+                workers, executor, chunk_size):
+    if workers is None and executor is None:
+        pipeline = parse_pipeline(dialect, coalesce_whitespace)
+        for sql in queries:
+            yield tuple(pipeline.run(sql, encoding))
+        return
+    args = encoding, getattr(dialect, 'name', None), coalesce_whitespace
+    for data in _fan_out(_parse_chunk, queries, args, workers, executor,
+                         chunk_size):
+        for stmts in pickle.loads(data):
+            yield stmts
+
+
+def parse_many(queries, encoding=None, dialect=None,
+               coalesce_whitespace=False, workers=None, executor=None,
+               chunk_size=CHUNK_SIZE):
+    """Parses each of *queries*, see :func:`sqlparse.parse`.
+
+    Without *workers* or *executor* all queries are parsed in this
+    process. Otherwise chunks of *chunk_size* queries are parsed in a
+    pool of *workers* processes (default: one per CPU) or by an existing
+    :class:`concurrent.futures.Executor`. Only registered dialects can
+    be used then.
+
+    Returns a generator yielding a tuple of statements per query, in
+    input order.
+    """
+    if dialect is not None:
+        # Fail early for unknown dialects.
+        dialect = get_dialect(dialect)
+    return _parse_many(queries, encoding, dialect, coalesce_whitespace,
+                       workers, executor, chunk_size)
+
+
+def _format_many(queries, encoding, dialect, coalesce_whitespace, options,
+                 workers, executor, chunk_size):
+    if workers is None and executor is None:
+        pipeline = format_pipeline(options, dialect, coalesce_whitespace)
+        for sql in queries:
+            yield u''.join(pipeline.run(sql, encoding))
+        return
+    args = (encoding, getattr(dialect, 'name', None), coalesce_whitespace,
+            options)
+    for texts in _fan_out(_format_chunk, queries, args, workers, executor,
+                          chunk_size):
+        for text in texts:
+            yield text
+
+
+def format_many(queries, encoding=None, dialect=None,
+                coalesce_whitespace=False, workers=None, executor=None,
+                chunk_size=CHUNK_SIZE, **options):
+    """Formats each of *queries*, see :func:`sqlparse.format`.
+
+    *workers*, *executor* and *chunk_size* are described in
+    :func:`parse_many`. The options are validated before this function
+    returns.
+
+    Returns a generator yielding the formatted queries in input order.
+    """
+    from sqlparse import formatter
+
+    options = formatter.validate_options(options)
+    if dialect is not None:
+        dialect = get_dialect(dialect)
+    return _format_many(queries, encoding, dialect, coalesce_whitespace,
+                        options, workers, executor, chunk_size)
@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2009-2018 the sqlparse authors and contributors
+# <see AUTHORS file>
+#
+# This module is part of python-sqlparse and is released under
+# the BSD License: https://opensource.org/licenses/BSD-3-Clause
+
+"""Caching of parse results for repeated queries.
+
+Filters change statements in place, so the cached trees are never
+handed out. Every hit returns a copy made by :func:`clone`, which is
+much cheaper than lexing and grouping the text again.
+
+:class:`TemplateCache` goes one step further for queries that only
+differ in their literals. These are lexed, but grouped only once.
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+
+from sqlparse import keywords, lexer, tokens as T
+from sqlparse.compat import file_types
+from sqlparse.engine import grouping
+from sqlparse.engine.filter_stack import FilterStack
+from sqlparse.engine.statement_splitter import StatementSplitter
+
+_new = object.__new__
+
+
+def clone(token, parent=None):
+    """Returns a deep copy of *token* and its children.
+
+    Values and token types are immutable and shared with the original,
+    *parent* becomes the parent of the copy.
+    """
+    copy = _new(token.__class__)
+    copy.parent = parent
+    copy.ttype = token.ttype
+    copy.is_keyword = token.is_keyword
+    copy.is_whitespace = token.is_whitespace
+    copy.is_group = token.is_group
+    if token.is_group:
+        copy.tokens = [clone(child, copy) for child in token.tokens]
+        # Values of groups are computed when needed, see TokenList.
+        value = getattr(token, '_value', None)
+        if value is not None:
+            copy.value = value
+    else:
+        copy.value = token.value
+        copy.normalized = token.normalized
+    return copy
+
+
+def _is_slot(ttype):
+    return (ttype in T.Number or ttype in T.String.Single
+            or ttype in T.Name.Placeholder)
+
+
+def bind(token, values, parent=None):
+    """Like :func:`clone`, but literals and placeholders get their
+    values from the iterator *values*, in the order of
+    :meth:`~sqlparse.sql.TokenList.flatten`."""
+    copy = _new(token.__class__)
+    copy.parent = parent
+    copy.ttype = ttype = token.ttype
+    copy.is_keyword = token.is_keyword
+    copy.is_whitespace = token.is_whitespace
+    copy.is_group = token.is_group
+    if token.is_group:
+        copy.tokens = [bind(child, values, copy) for child in token.tokens]
+    elif _is_slot(ttype):
+        copy.value = copy.normalized = next(values)
+    else:
+        copy.value = token.value
+        copy.normalized = token.normalized
+    return copy
+
+
+def _template(tokens):
+    """Returns the token stream with slots for literals as key and the
+    values of the literals."""
+    key = []
+    values = []
+    for token in tokens:
+        if _is_slot(token[0]):
+            key.append(token[0])
+            values.append(token[1])
+        else:
+            key.append(token)
+    return tuple(key), values
+
+
+def _key(text, stack, coalesce_whitespace):
+    # Without a dialect, the keywords depend on keywords.DB.
+    dialect = stack.dialect
+    if dialect is None:
+        dialect = keywords.DB
+    return text, dialect, coalesce_whitespace
+
+
+def _sizeof_template(template):
+    """Estimates the memory used by the key *template*."""
+    size = sys.getsizeof(template)
+    for item in template:
+        size += sys.getsizeof(item)
+        # Slots are token types, other items are tokens with a value.
+        if not isinstance(item, T._TokenType):
+            size += sys.getsizeof(item[1])
+    return size
+
+
+def _sizeof(token):
+    """Estimates the memory used by *token* and its children."""
+    size = sys.getsizeof(token)
+    if token.is_group:
+        # Only values that were computed already take up memory.
+        value = getattr(token, '_value', None)
+        if value is not None:
+            size += sys.getsizeof(value)
+        size += sys.getsizeof(token.tokens)
+        size += sum(_sizeof(child) for child in token.tokens)
+    else:
+        size += sys.getsizeof(token.value)
+        if token.normalized is not token.value:
+            size += sys.getsizeof(token.normalized)
+    return size
+
+
+class ParseCache(object):
+    """A least recently used cache of parsed statements.
+
+    At most *maxsize* queries are kept (no limit if ``None``) and, if
+    *maxbytes* is given, the estimated size of their trees stays below
+    that. Queries are identified by their text, dialect (or
+    ``keywords.DB`` without one) and whitespace handling. Keyword tables
+    changed in place aren't noticed, call :meth:`clear` after that.
+
+    The ``hits``, ``misses`` and ``evictions`` counters are updated by
+    :meth:`parse`. A cache can be shared between threads.
+    """
+
+    def __init__(self, maxsize=1024, maxbytes=None):
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.nbytes = 0
+        self.hits = self.misses = self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __repr__(self):
+        return ('<{0} entries={1} bytes={2} hits={3} misses={4} '
+                'evictions={5}>'.format(
+                    self.__class__.__name__, len(self), self.nbytes,
+                    self.hits, self.misses, self.evictions))
+
+    def clear(self):
+        """Removes all entries, the counters are kept."""
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def parse(self, sql, encoding=None, dialect=None,
+              coalesce_whitespace=False):
+        """Parses *sql* like :func:`sqlparse.parse`, using the cache.
+
+        :returns: A tuple of new :class:`~sqlparse.sql.Statement`
+          instances, they can be changed freely.
+        """
+        if isinstance(sql, file_types):
+            sql = sql.read()
+        sql = lexer.decode(sql, encoding)
+        stack = FilterStack(dialect, coalesce_whitespace)
+        key = _key(sql, stack, coalesce_whitespace)
+
+        cached = self._get(key)
+        if cached is not None:
+            return tuple(clone(stmt) for stmt in cached)
+
+        stack.enable_grouping()
+        stmts = tuple(stack.run(sql))
+        self._add(key, tuple(clone(stmt) for stmt in stmts),
+                  sys.getsizeof(sql))
+        return stmts
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries[key] = entry
+            self.hits += 1
+        return entry[0]
+
+    def _add(self, key, stmts, size=0):
+        size += sum(_sizeof(stmt) for stmt in stmts)
+        if self.maxbytes is not None and size > self.maxbytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.nbytes -= old[1]
+            self._entries[key] = stmts, size
+            self.nbytes += size
+            while (self.maxsize is not None
+                   and len(self._entries) > self.maxsize
+                   or self.maxbytes is not None
+                   and self.nbytes > self.maxbytes):
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.nbytes -= evicted
+                self.evictions += 1
+
+
+class TemplateCache(ParseCache):
+    """A :class:`ParseCache` for queries that differ in literals only.
+
+    Numbers, single quoted strings and placeholders are replaced by
+    slots before the lexed query is looked up. On a hit the cached
+    statements are copied with the literals of the query filled in
+    (see :func:`bind`), so only statement splitting and grouping are
+    saved. The size limits include the keys, which contain the whole
+    token stream.
+    """
+
+    def parse(self, sql, encoding=None, dialect=None,
+              coalesce_whitespace=False):
+        if isinstance(sql, file_types):
+            sql = sql.read()
+        stack = FilterStack(dialect, coalesce_whitespace)
+        tokens = list(lexer.tokenize(sql, encoding, stack.dialect,
+                                     coalesce_whitespace))
+        template, values = _template(tokens)
+        key = _key(template, stack, coalesce_whitespace)
+
+        cached = self._get(key)
+        if cached is not None:
+            values = iter(values)
+            return tuple(bind(stmt, values) for stmt in cached)
+
+        stmts = tuple(grouping.group(stmt) for stmt in
+                      StatementSplitter().process(iter(tokens)))
+        self._add(key, tuple(clone(stmt) for stmt in stmts),
+                  _sizeof_template(template))
+        return stmts
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2009-2018 the sqlparse authors and contributors
+# <see AUTHORS file>
+#
+# This module is part of python-sqlparse and is released under
+# the BSD License: https://opensource.org/licenses/BSD-3-Clause
+
+"""Resumable parsing of long streams.
+
+:func:`parsestream` yields a checkpoint with every statement. Saving
+the latest one allows to continue parsing at that statement boundary
+later, e.g. after a restart, without lexing everything in front of it
+again. Checkpoints are dictionaries of plain values and can be stored
+with :mod:`json` or :mod:`pickle`::
+
+    {'offset': 1234,        # characters in front of the boundary
+     'byte_offset': 1240,   # bytes, None for text streams
+     'context': u';',       # the last of those characters
+     'splitter': {...}}     # see StatementSplitter.get_state()
+"""
+
+import codecs
+
+from sqlparse import lexer
+from sqlparse.compat import bytes_type
+from sqlparse.engine import grouping
+from sqlparse.engine.filter_stack import FilterStack
+from sqlparse.engine.statement_splitter import StatementSplitter
+
+
+def _checkpoint(offset, byte_offset, context):
+    # The splitter starts over at statement boundaries, the lexer needs
+    # the text in front of it for lookbehinds.
+    return {'offset': offset, 'byte_offset': byte_offset,
+            'context': context[len(context) - lexer.LOOKBEHIND:],
+            'splitter': StatementSplitter().get_state()}
+
+
+def _has_bom(data, bom):
+    # Decoders skip a byte order mark in either byte order.
+    return bool(bom) and data[:len(bom)] in (bom, bom[::-1])
+
+
+def _skip(stream, count, chunk_size):
+    while count > 0:
+        chunk = stream.read(min(count, chunk_size))
+        if not chunk:
+            break
+        count -= len(chunk)
+
+
+def parsestream(stream, encoding=None, dialect=None,
+                coalesce_whitespace=False, checkpoint=None,
+                chunk_size=lexer.CHUNK_SIZE):
+    """Parses statements from a file-like object like
+    :func:`sqlparse.parsestream`, but yields ``(statement, checkpoint)``
+    pairs.
+
+    The checkpoint is the position behind the statement. Only for the
+    last statement of the stream it's the position in front of it, as
+    the statement may continue if the stream grows.
+
+    Parsing starts at *checkpoint* if given. For binary streams the
+    stream is moved there with ``seek()``. Text streams are read up to
+    the checkpoint without lexing, which is much slower, so open files
+    in binary mode if they are resumed often.
+    """
+    stack = FilterStack(dialect, coalesce_whitespace)
+    splitter = StatementSplitter()
+    offset = byte_offset = 0
+    context = u''
+    if checkpoint is not None:
+        offset = checkpoint['offset']
+        byte_offset = checkpoint['byte_offset']
+        context = checkpoint.get('context', u'')
+        splitter.set_state(checkpoint['splitter'])
+        if byte_offset is not None:
+            stream.seek(byte_offset)
+        else:
+            _skip(stream, offset, chunk_size)
+    lex = lexer.IncrementalLexer(
+        lexer.get_rules(stack.dialect, coalesce_whitespace),
+        context=context)
+
+    decoder = byte_length = None
+    final = False
+    while not final:
+        chunk = stream.read(chunk_size)
+        final = not chunk
+        if isinstance(chunk, bytes_type):
+            if decoder is None:
+                encoding = encoding or 'utf-8'
+                decoder = codecs.getincrementaldecoder(encoding)()
+                bom, byte_length = lexer._byte_length(encoding)
+                if checkpoint is None:
+                    if _has_bom(chunk, bom):
+                        byte_offset = len(bom)
+                elif bom:
+                    # The decoder needs the mark at the start of the
+                    # stream to continue in the middle of it.
+                    pos = stream.tell()
+                    stream.seek(0)
+                    head = stream.read(len(bom))
+                    stream.seek(pos)
+                    if _has_bom(head, bom):
+                        decoder.decode(head)
+            chunk = decoder.decode(chunk, final)
+        elif decoder is None:
+            byte_offset = None
+
+        stmts = list(splitter.feed(lex.feed(chunk, final), final))
+        for i, stmt in enumerate(stmts):
+            # The last statement of the stream may be incomplete.
+            if not final or i < len(stmts) - 1:
+                value = stmt.value
+                offset += len(value)
+                if byte_offset is not None:
+                    byte_offset += byte_length(value)
+                context = (context + value)[-lexer.LOOKBEHIND:]
+            yield (grouping.group(stmt),
+                   _checkpoint(offset, byte_offset, context))
@@ -8,34 +8,78 @@
 
 """filter"""
 
-from sqlparse import lexer
+from sqlparse import lexer, tokens as T
 from sqlparse.engine import grouping
+from sqlparse.sql import LazyStatement, Statement, Token
 from sqlparse.engine.statement_splitter import StatementSplitter
 
 
+def _split_whitespace(stmt):
+    # The filters remove single whitespace tokens, which are single
+    # characters unless the lexer coalesced them. Splitting the runs
+    # again makes the output independent of the lexer mode.
+    for token in list(stmt.flatten()):
+        if token.ttype is T.Whitespace and len(token.value) > 1:
+            parent = token.parent
+            idx = parent.token_index(token)
+            chars = [Token(T.Whitespace, char) for char in token.value]
+            for char in chars:
+                char.parent = parent
+            parent.tokens[idx:idx + 1] = chars
+
+
+def _join_values(tlist):
+    # Filters read the values of groups as they were after grouping,
+    # even after changing their tokens.
+    for token in tlist.tokens:
+        if token.is_group:
+            _join_values(token)
+    tlist.value = u''.join(token.value for token in tlist.tokens)
+
+
 class FilterStack(object):
-    def __init__(self):
+    def __init__(self, dialect=None, coalesce_whitespace=False,
+                 max_tokens=None):
+        if dialect is not None:
+            from sqlparse.dialects import get_dialect
+            dialect = get_dialect(dialect)
+        self.dialect = dialect
+        self.coalesce_whitespace = coalesce_whitespace
+        self.max_tokens = max_tokens
         self.preprocess = []
         self.stmtprocess = []
         self.postprocess = []
         self._grouping = False
+        self._lazy = False
 
-    def enable_grouping(self):
+    def enable_grouping(self, lazy=False):
+        """Groups the statements. If *lazy* is true, they are grouped on
+        first use, see :class:`~sqlparse.sql.LazyStatement`."""
         self._grouping = True
+        self._lazy = lazy
 
     def run(self, sql, encoding=None):
-        stream = lexer.tokenize(sql, encoding)
+        stream = lexer.tokenize(sql, encoding, self.dialect,
+                                self.coalesce_whitespace)
         # Process token stream
         for filter_ in self.preprocess:
             stream = filter_.process(stream)
 
-        stream = StatementSplitter().process(stream)
+        stream = StatementSplitter(self.max_tokens).process(stream)
 
         # Output: Stream processed Statements
         for stmt in stream:
-            if self._grouping:
+            if self._lazy and stmt.__class__ is Statement:
+                stmt = LazyStatement(stmt.tokens, grouping.group)
+            elif self._grouping and getattr(stmt, 'groupable', True):
                 stmt = grouping.group(stmt)
 
+            if self.coalesce_whitespace and (self.stmtprocess
+                                             or self.postprocess):
+                _split_whitespace(stmt)
+            if self.stmtprocess:
+                _join_values(stmt)
+
             for filter_ in self.stmtprocess:
                 filter_.process(stmt)
 
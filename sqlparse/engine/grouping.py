@@ -6,14 +6,30 @@
 # This module is part of python-sqlparse and is released under
 # the BSD License: https://opensource.org/licenses/BSD-3-Clause
 
+from operator import attrgetter
+
 from sqlparse import sql
 from sqlparse import tokens as T
+from sqlparse.compat import string_types
 from sqlparse.utils import recurse, imt
 
 T_NUMERICAL = (T.Number, T.Number.Integer, T.Number.Float)
 T_STRING = (T.String, T.String.Single, T.String.Symbol)
 T_NAME = (T.Name, T.Name.Placeholder)
 
+_ttype = attrgetter('ttype')
+
+
+def _needs(*kinds):
+    """Decorator for grouping functions that leave a token list alone
+    unless it contains a token of one of the types or classes in
+    *kinds*, see :func:`_fused`."""
+    def wrap(f):
+        f.needs = frozenset(getattr(kind, '_id', kind) for kind in kinds)
+        return f
+
+    return wrap
+
 
 def _group_matching(tlist, cls):
     """Groups Tokens that have beginning and end."""
@@ -74,7 +90,123 @@ def group_begin(tlist):
     _group_matching(tlist, sql.Begin)
 
 
-def group_typecasts(tlist):
+# The classes grouped by group_matching(), in the order in which the
+# functions above are called. For the opening and closing tokens of
+# each class, its type and the bit masks of the classes it opens and
+# closes by its normalized value.
+_MATCHING = (sql.SquareBrackets, sql.Parenthesis, sql.Case, sql.If,
+             sql.For, sql.Begin)
+_M_TOKENS = {}
+
+
+def _add_matching(i, ttype, values, closes):
+    if isinstance(values, string_types):
+        values = (values,)
+    for value in values:
+        if ttype in T.Keyword:
+            value = value.upper()
+        _, opened, closed = _M_TOKENS.get(value, (ttype, 0, 0))
+        if closes:
+            closed |= 1 << i
+        else:
+            opened |= 1 << i
+        _M_TOKENS[value] = ttype, opened, closed
+
+
+for _i, _cls in enumerate(_MATCHING):
+    _add_matching(_i, *_cls.M_OPEN, closes=False)
+    _add_matching(_i, *_cls.M_CLOSE, closes=True)
+del _i, _cls
+
+
+def group_matching(tlist, skip=0):
+    """Groups tokens that have beginning and end for all classes at once.
+
+    The result is the same as that of calling group_brackets(),
+    group_parenthesis(), group_case(), group_if(), group_for() and
+    group_begin() one after another, which walk the tree six times.
+    Classes in the bit mask *skip* aren't grouped.
+    """
+    marks = []
+    present = 0
+    for idx, token in enumerate(tlist.tokens):
+        if token.is_group:
+            sub = skip
+            if isinstance(token, _MATCHING):
+                sub |= sum(1 << i for i, cls in enumerate(_MATCHING)
+                           if isinstance(token, cls))
+            group_matching(token, sub)
+            continue
+        entry = _M_TOKENS.get(token.normalized)
+        if entry is not None and token.ttype is entry[0]:
+            marks.append((idx, entry[1], entry[2]))
+            present |= entry[1]
+    present &= ~skip
+    if not present:
+        return
+
+    # Like _group_matching() for each class, within the groups of the
+    # classes before it. Their opening and closing tokens are in them.
+    spans = {}
+    closes = {}
+    end = len(tlist.tokens)
+    for i, cls in enumerate(_MATCHING):
+        bit = 1 << i
+        if not present & bit:
+            continue
+        found = {}
+        scopes = [(end, [])]
+        for idx, opened, closed in marks:
+            while scopes[-1][0] < idx:
+                scopes.pop()
+            if idx in spans:
+                scopes.append((spans[idx], []))
+            if opened & bit:
+                scopes[-1][1].append(idx)
+            elif closed & bit and scopes[-1][1]:
+                open_idx = scopes[-1][1].pop()
+                found[open_idx] = idx
+                closes.setdefault(idx, []).append((open_idx, cls))
+        spans.update(found)
+
+    # Groups sharing their closing token (as in "CASE BEGIN END") are
+    # nested, the later class inside.
+    offset = 0
+    opens = {}
+    for idx, _, _ in marks:
+        if idx in spans:
+            opens[idx] = idx - offset
+        elif idx in closes:
+            for open_idx, cls in sorted(closes[idx], reverse=True,
+                                        key=lambda span: span[0]):
+                close_idx = idx - offset
+                tlist.group_tokens(cls, opens[open_idx], close_idx)
+                offset += close_idx - opens[open_idx]
+
+
+def _group_by(cls, extend=True):
+    """Decorator for functions returning the *match*, *valid_prev*,
+    *valid_next* and *post* arguments of :func:`_group`.
+
+    They are created once. The result groups a token list and its
+    sublists, except for those of class *cls*.
+    """
+    def wrap(f):
+        match, valid_prev, valid_next, post = f()
+
+        @recurse(cls)
+        def group_func(tlist):
+            _group(tlist, cls, match, valid_prev, valid_next, post, extend,
+                   recurse=False)
+
+        return group_func
+
+    return wrap
+
+
+@_needs(T.Punctuation)
+@_group_by(sql.Identifier)
+def group_typecasts():
     def match(token):
         return token.match(T.Punctuation, '::')
 
@@ -85,10 +217,12 @@ def group_typecasts(tlist):
         return pidx, nidx
 
     valid_prev = valid_next = valid
-    _group(tlist, sql.Identifier, match, valid_prev, valid_next, post)
+    return match, valid_prev, valid_next, post
 
 
-def group_period(tlist):
+@_needs(T.Punctuation)
+@_group_by(sql.Identifier)
+def group_period():
     def match(token):
         return token.match(T.Punctuation, '.')
 
@@ -110,15 +244,17 @@ def group_period(tlist):
 
         return (pidx, nidx) if valid_next else (pidx, tidx)
 
-    _group(tlist, sql.Identifier, match, valid_prev, valid_next, post)
+    return match, valid_prev, valid_next, post
 
 
-def group_as(tlist):
+@_needs(T.Keyword)
+@_group_by(sql.Identifier)
+def group_as():
     def match(token):
         return token.is_keyword and token.normalized == 'AS'
 
     def valid_prev(token):
-        return token.normalized == 'NULL' or not token.is_keyword
+        return not token.is_keyword or token.normalized == 'NULL'
 
     def valid_next(token):
         ttypes = T.DML, T.DDL
@@ -127,7 +263,7 @@ def group_as(tlist):
     def post(tlist, pidx, tidx, nidx):
         return pidx, nidx
 
-    _group(tlist, sql.Identifier, match, valid_prev, valid_next, post)
+    return match, valid_prev, valid_next, post
 
 
 def group_assignment(tlist):
@@ -147,7 +283,9 @@ def group_assignment(tlist):
     _group(tlist, sql.Assignment, match, valid_prev, valid_next, post)
 
 
-def group_comparison(tlist):
+@_needs(T.Operator.Comparison)
+@_group_by(sql.Comparison, extend=False)
+def group_comparison():
     sqlcls = (sql.Parenthesis, sql.Function, sql.Identifier,
               sql.Operation)
     ttypes = T_NUMERICAL + T_STRING + T_NAME
@@ -167,10 +305,10 @@ def group_comparison(tlist):
         return pidx, nidx
 
     valid_prev = valid_next = valid
-    _group(tlist, sql.Comparison, match,
-           valid_prev, valid_next, post, extend=False)
+    return match, valid_prev, valid_next, post
 
 
+@_needs(T.String.Symbol, T.Name)
 @recurse(sql.Identifier)
 def group_identifier(tlist):
     ttypes = (T.String.Symbol, T.Name)
@@ -181,6 +319,7 @@ def group_identifier(tlist):
         tidx, token = tlist.token_next_by(t=ttypes, idx=tidx)
 
 
+@_needs(sql.SquareBrackets)
 def group_arrays(tlist):
     sqlcls = sql.SquareBrackets, sql.Identifier, sql.Function
     ttypes = T.Name, T.String.Symbol
@@ -201,7 +340,9 @@ def group_arrays(tlist):
            valid_prev, valid_next, post, extend=True, recurse=False)
 
 
-def group_operator(tlist):
+@_needs(T.Operator, T.Wildcard)
+@_group_by(sql.Operation, extend=False)
+def group_operator():
     ttypes = T_NUMERICAL + T_STRING + T_NAME
     sqlcls = (sql.SquareBrackets, sql.Parenthesis, sql.Function,
               sql.Identifier, sql.Operation)
@@ -217,11 +358,12 @@ def group_operator(tlist):
         return pidx, nidx
 
     valid_prev = valid_next = valid
-    _group(tlist, sql.Operation, match,
-           valid_prev, valid_next, post, extend=False)
+    return match, valid_prev, valid_next, post
 
 
-def group_identifier_list(tlist):
+@_needs(T.Punctuation)
+@_group_by(sql.IdentifierList)
+def group_identifier_list():
     m_role = T.Keyword, ('null', 'role')
     sqlcls = (sql.Function, sql.Case, sql.Identifier, sql.Comparison,
               sql.IdentifierList, sql.Operation)
@@ -238,8 +380,7 @@ def group_identifier_list(tlist):
         return pidx, nidx
 
     valid_prev = valid_next = valid
-    _group(tlist, sql.IdentifierList, match,
-           valid_prev, valid_next, post, extend=True)
+    return match, valid_prev, valid_next, post
 
 
 @recurse(sql.Comment)
@@ -255,6 +396,7 @@ def group_comments(tlist):
         tidx, token = tlist.token_next_by(t=T.Comment, idx=tidx)
 
 
+@_needs(T.Keyword)
 @recurse(sql.Where)
 def group_where(tlist):
     tidx, token = tlist.token_next_by(m=sql.Where.M_OPEN)
@@ -272,10 +414,13 @@ def group_where(tlist):
         tidx, token = tlist.token_next_by(m=sql.Where.M_OPEN, idx=tidx)
 
 
+I_ALIAS = (sql.Parenthesis, sql.Function, sql.Case, sql.Identifier,
+           sql.Operation, sql.Comparison)
+
+
+@_needs(T.Number, *I_ALIAS)
 @recurse()
 def group_aliased(tlist):
-    I_ALIAS = (sql.Parenthesis, sql.Function, sql.Case, sql.Identifier,
-               sql.Operation, sql.Comparison)
 
     tidx, token = tlist.token_next_by(i=I_ALIAS, t=T.Number)
     while token:
@@ -285,11 +430,15 @@ def group_aliased(tlist):
         tidx, token = tlist.token_next_by(i=I_ALIAS, t=T.Number, idx=tidx)
 
 
+@_needs(T.Name)
 @recurse(sql.Function)
 def group_functions(tlist):
     has_create = False
     has_table = False
     for tmp_token in tlist.tokens:
+        if tmp_token.is_group:
+            # Groups aren't keywords, don't compute their value.
+            continue
         if tmp_token.value == 'CREATE':
             has_create = True
         if tmp_token.value == 'TABLE':
@@ -305,6 +454,7 @@ def group_functions(tlist):
         tidx, token = tlist.token_next_by(t=T.Name, idx=tidx)
 
 
+@_needs(T.Keyword.Order)
 def group_order(tlist):
     """Group together Identifier and Asc/Desc token"""
     tidx, token = tlist.token_next_by(t=T.Keyword.Order)
@@ -316,6 +466,7 @@ def group_order(tlist):
         tidx, token = tlist.token_next_by(t=T.Keyword.Order, idx=tidx)
 
 
+@_needs(sql.Comment)
 @recurse()
 def align_comments(tlist):
     tidx, token = tlist.token_next_by(i=sql.Comment)
@@ -327,33 +478,132 @@ def align_comments(tlist):
         tidx, token = tlist.token_next_by(i=sql.Comment, idx=tidx)
 
 
+def _kinds(tlist):
+    """Returns the classes of the groups in *tlist* and the ids of the
+    types of its other tokens and their parent types."""
+    kinds = set(map(type, tlist.tokens))
+    for ttype in set(map(_ttype, tlist.tokens)):
+        if ttype is not None:
+            kinds.update(ttype._ancestry)
+    return kinds
+
+
+def _fused(*funcs):
+    """Combines grouping functions into one that walks the tree once.
+
+    Sublists get all functions first, then each function runs on the
+    list itself and the groups it creates there get the remaining ones.
+    This gives the same result as calling them one after another only
+
+    - if no function hides groups from a later one by wrapping them in
+      a class that one doesn't recurse over,
+    - if appending tokens to an existing group doesn't change what a
+      later function does with it and
+    - if later functions neither change nor need groups of a single
+      token, which aren't noticed.
+
+    Functions that aren't decorated with ``recurse`` only run on the
+    statement itself. Those decorated with :func:`_needs` are skipped
+    for lists without the token types or classes they need.
+    """
+    levels = [getattr(func, 'level', func) for func in funcs]
+    skips = [getattr(func, 'skip', sql.TokenList) for func in funcs]
+    needs = [getattr(func, 'needs', None) for func in funcs]
+    # Sets of functions are bit masks. For each mask and group class
+    # the functions that apply to the group, for each mask the level
+    # functions with the mask of the functions following them.
+    todo = {}
+    plans = {}
+
+    def remaining(mask, cls):
+        try:
+            return todo[mask, cls]
+        except KeyError:
+            sub = todo[mask, cls] = sum(
+                1 << i for i, skip in enumerate(skips)
+                if mask & 1 << i and not issubclass(cls, skip))
+            return sub
+
+    def plan(mask):
+        try:
+            return plans[mask]
+        except KeyError:
+            steps = plans[mask] = [(level, mask >> i + 1 << i + 1, needs[i])
+                                   for i, level in enumerate(levels)
+                                   if mask & 1 << i]
+            return steps
+
+    def walk(tlist, mask, seen):
+        seen.add(id(tlist))
+        for sgroup in tlist.get_sublists():
+            if id(sgroup) not in seen:
+                sub = remaining(mask, sgroup.__class__)
+                if sub:
+                    walk(sgroup, sub, seen)
+
+        kinds = None
+        for level, later, needed in plan(mask):
+            if needed is not None:
+                if kinds is None:
+                    kinds = _kinds(tlist)
+                if kinds.isdisjoint(needed):
+                    continue
+            if not later:
+                level(tlist)
+                break
+            count = len(tlist.tokens)
+            level(tlist)
+            if len(tlist.tokens) == count:
+                continue
+            kinds = None
+            for sgroup in tlist.get_sublists():
+                if id(sgroup) not in seen:
+                    sub = remaining(later, sgroup.__class__)
+                    if sub:
+                        walk(sgroup, sub, seen)
+
+    def fused(tlist):
+        walk(tlist, (1 << len(funcs)) - 1, set())
+
+    return fused
+
+
+# Checked against the conditions of _fused():
+# - Function and Where aren't skipped by group_period. A Where of a
+#   single keyword has no period.
+# - group_identifier wraps single names, group_order an Identifier or a
+#   number. Appending "::type" neither adds a valid operand nor an
+#   operator to an operation or comparison.
+# - Appending "AS alias" doesn't add a valid alias to group_aliased.
+# - align_comments only appends comments to groups, which can't be an
+#   item of an IdentifierList.
+_group_clauses = _fused(group_functions, group_where, group_period,
+                        group_arrays)
+_group_expressions = _fused(group_identifier, group_order, group_typecasts,
+                            group_operator, group_comparison)
+_group_aliases = _fused(group_as, group_aliased)
+_group_lists = _fused(align_comments, group_identifier_list)
+
+
 def group(stmt):
     for func in [
         group_comments,
 
-        # _group_matching
-        group_brackets,
-        group_parenthesis,
-        group_case,
-        group_if,
-        group_for,
-        group_begin,
-
-        group_functions,
-        group_where,
-        group_period,
-        group_arrays,
-        group_identifier,
-        group_order,
-        group_typecasts,
-        group_operator,
-        group_comparison,
-        group_as,
-        group_aliased,
+        # group_brackets, group_parenthesis, group_case, group_if,
+        # group_for, group_begin
+        group_matching,
+
+        # group_functions, group_where, group_period, group_arrays
+        _group_clauses,
+        # group_identifier, group_order, group_typecasts,
+        # group_operator, group_comparison
+        _group_expressions,
+        # group_as, group_aliased
+        _group_aliases,
         group_assignment,
 
-        align_comments,
-        group_identifier_list,
+        # align_comments, group_identifier_list
+        _group_lists,
     ]:
         func(stmt)
     return stmt
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2009-2018 the sqlparse authors and contributors
+# <see AUTHORS file>
+#
+# This module is part of python-sqlparse and is released under
+# the BSD License: https://opensource.org/licenses/BSD-3-Clause
+
+"""Re-parsing of edited text.
+
+Neither the lexer nor the statement splitter carry state over a
+statement boundary. After an edit, lexing starts at the beginning of the
+statement in front of the edited one (the end of a statement depends on
+the token following it). It stops at the first statement boundary behind
+the edit that was a boundary before, as the rest of the text and
+therefore its statements are unchanged.
+
+The exception are strings and comments that are never closed. Their
+first characters are lexed as separate tokens, until an edit adds the
+missing delimiter anywhere behind them.
+"""
+
+import bisect
+import weakref
+
+from sqlparse import lexer
+from sqlparse.engine import grouping
+from sqlparse.engine.statement_splitter import StatementSplitter
+
+
+_UNCLOSED = weakref.WeakKeyDictionary()
+
+
+def _unclosed(stmt):
+    """Whether a string or comment that isn't closed starts in *stmt*."""
+    try:
+        return _UNCLOSED[stmt]
+    except KeyError:
+        pass
+    text = stmt.value
+    pos = 0
+    result = False
+    for token in stmt.flatten():
+        if token.value[:1] in lexer._OPEN_CHARS:
+            m = lexer._OPEN_TOKEN.match(text, pos)
+            # It runs up to the end, yet it's longer than the token.
+            if (m is not None and m.end() == len(text)
+                    and m.end() - pos > len(token.value)):
+                result = True
+                break
+        pos += len(token.value)
+    _UNCLOSED[stmt] = result
+    return result
+
+
+def _pieces(text, statements):
+    for stmt in statements:
+        yield text, False
+        text = stmt.value
+    yield text, True
+
+
+def reparse(statements, offset, deleted, inserted, dialect=None,
+            coalesce_whitespace=False):
+    """Applies an edit to the text of *statements* and parses it again.
+
+    The edit replaces *deleted* characters at *offset* by the string
+    *inserted*. Offsets count from the start of the first statement.
+    *dialect* and *coalesce_whitespace* have to be the ones the
+    statements were parsed with.
+
+    Returns a tuple of statements like :func:`sqlparse.parse` would for
+    the edited text. Statements before and after the edited region are
+    taken over from *statements*, the same objects.
+    """
+    statements = tuple(statements)
+    inserted = lexer.decode(inserted)
+    ends = []
+    end = 0
+    for stmt in statements:
+        end += len(stmt.value)
+        ends.append(end)
+    if not 0 <= offset <= offset + deleted <= end:
+        raise ValueError('Edit out of range: {0}+{1}, length {2}'.format(
+            offset, deleted, end))
+
+    # The edited statements, one more in front.
+    last = len(statements) - 1
+    first = max(0, min(bisect.bisect_right(ends, offset), last) - 1)
+    for i, stmt in enumerate(statements[:first]):
+        if _unclosed(stmt):
+            first = max(0, i - 1)
+            break
+    last = max(first, min(bisect.bisect_left(ends, offset + deleted), last))
+    start = ends[first - 1] if first else 0
+    text = u''.join(stmt.value for stmt in statements[first:last + 1])
+    text = (text[:offset - start] + inserted +
+            text[offset + deleted - start:])
+
+    rules = lexer.get_rules(dialect, coalesce_whitespace)
+    context = statements[first - 1].value if first else u''
+    lex = lexer.IncrementalLexer(rules, context=context)
+    splitter = StatementSplitter()
+    delta = len(inserted) - deleted
+    edit_end = offset + len(inserted)
+    pos = start
+    new = []
+    for piece, final in _pieces(text, statements[last + 1:]):
+        for stmt in splitter.feed(lex.feed(piece, final), final):
+            new.append(grouping.group(stmt))
+            pos += len(stmt.value)
+            if pos < edit_end:
+                continue
+            k = bisect.bisect_left(ends, pos - delta)
+            if k < len(ends) and ends[k] == pos - delta:
+                return statements[:first] + tuple(new) + statements[k + 1:]
+    return statements[:first] + tuple(new)
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2009-2018 the sqlparse authors and contributors
+# <see AUTHORS file>
+#
+# This module is part of python-sqlparse and is released under
+# the BSD License: https://opensource.org/licenses/BSD-3-Clause
+
+"""Parsing in a pool of worker processes.
+
+The statement boundaries are found in the calling process, which is
+cheap compared to grouping (see :meth:`StatementSplitter.split_spans`).
+Runs of statements are then sent to the workers as one string each and
+come back as pickled :class:`~sqlparse.sql.Statement` instances.
+
+On Python 2 the :mod:`concurrent.futures` backport (``futures`` on PyPI)
+has to be installed.
+"""
+
+import itertools
+import pickle
+
+from sqlparse import lexer
+from sqlparse.compat import file_types
+from sqlparse.engine.filter_stack import FilterStack
+from sqlparse.engine.statement_splitter import StatementSplitter
+
+#: Default number of statements parsed by a worker at once.
+CHUNK_SIZE = 256
+
+
+def _parse_chunk(sql, dialect, coalesce_whitespace):
+    stack = FilterStack(dialect, coalesce_whitespace)
+    stack.enable_grouping()
+    return pickle.dumps(list(stack.run(sql)), pickle.HIGHEST_PROTOCOL)
+
+
+def _chunks(sql, chunk_size, dialect):
+    """Splits *sql* into strings of *chunk_size* statements each."""
+    stream = lexer.tokenize_spans(sql, dialect, coalesce_whitespace=True)
+    spans = StatementSplitter().split_spans(stream, sql)
+    while True:
+        chunk = list(itertools.islice(spans, chunk_size))
+        if not chunk:
+            break
+        yield sql[chunk[0][0]:chunk[-1][1]]
+
+
+def parse_parallel(sql, encoding=None, workers=None, chunk_size=CHUNK_SIZE,
+                   dialect=None, coalesce_whitespace=False, executor=None):
+    """Parses *sql* in worker processes, see :func:`sqlparse.parse`.
+
+    *workers* is the number of processes (default: one per CPU) and
+    *chunk_size* the number of statements handed to a worker at once.
+    An existing :class:`concurrent.futures.Executor` can be passed as
+    *executor* to save the start-up time of the pool. The dialect
+    has to be given by name.
+
+    Returns a tuple of statements in input order.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    if isinstance(sql, file_types):
+        sql = sql.read()
+    sql = lexer.decode(sql, encoding)
+    if dialect is not None:
+        # Fail early and in this process for unknown dialects.
+        lexer.get_rules(dialect)
+        dialect = getattr(dialect, 'name', dialect)
+
+    own_executor = executor is None
+    if own_executor:
+        executor = ProcessPoolExecutor(workers)
+    try:
+        results = executor.map(
+            _parse_chunk, _chunks(sql, chunk_size, dialect),
+            itertools.repeat(dialect), itertools.repeat(coalesce_whitespace))
+        stmts = []
+        for data in results:
+            stmts.extend(pickle.loads(data))
+    finally:
+        if own_executor:
+            executor.shutdown()
+    return tuple(stmts)
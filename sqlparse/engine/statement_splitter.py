@@ -9,10 +9,34 @@
 from sqlparse import sql, tokens as T
 
 
+class _Fragment(list):
+    """Tokens of a statement that has been cut, see :meth:`_cut`."""
+
+    def __init__(self, tokens=(), part=0, is_last=True, groupable=True):
+        super(_Fragment, self).__init__(tokens)
+        self.part = part
+        self.is_last = is_last
+        self.groupable = groupable
+
+
+def _statement(tokens):
+    if tokens.__class__ is list:
+        return sql.Statement(tokens)
+    return sql.StatementFragment(list(tokens), tokens.part,
+                                 tokens.is_last, tokens.groupable)
+
+
 class StatementSplitter(object):
-    """Filter that split stream at individual statements"""
+    """Filter that split stream at individual statements
+
+    If *max_tokens* is given, :meth:`process` and :meth:`feed` don't
+    keep more tokens than that of a statement. Longer statements are
+    yielded as :class:`~sqlparse.sql.StatementFragment` instances,
+    preferably cut behind a row of a ``VALUES`` list.
+    """
 
-    def __init__(self):
+    def __init__(self, max_tokens=None):
+        self.max_tokens = max_tokens
         self._reset()
 
     def _reset(self):
@@ -25,6 +49,47 @@ class StatementSplitter(object):
         self.tokens = []
         self.level = 0
 
+        # Parenthesis depth and VALUES seen at the start of self.tokens,
+        # only updated when a statement is cut.
+        self._depth = 0
+        self._in_values = False
+
+    def get_state(self):
+        """Returns the state of :meth:`process` or :meth:`feed` as a
+        dictionary of numbers, booleans, lists and strings.
+
+        Pending tokens are stored as ``[path, value]`` pairs, where
+        *path* lists the names of the token type.
+        """
+        return {
+            'level': self.level,
+            'begin_depth': self._begin_depth,
+            'is_create': self._is_create,
+            'in_declare': self._in_declare,
+            'consume_ws': self.consume_ws,
+            'tokens': [[list(token.ttype), token.value]
+                       for token in self.tokens],
+            'depth': self._depth,
+            'in_values': self._in_values,
+            'fragment': ([self.tokens.part, self.tokens.groupable]
+                         if isinstance(self.tokens, _Fragment) else None),
+        }
+
+    def set_state(self, state):
+        """Restores a state returned by :meth:`get_state`."""
+        self.level = state['level']
+        self._begin_depth = state['begin_depth']
+        self._is_create = state['is_create']
+        self._in_declare = state['in_declare']
+        self.consume_ws = state['consume_ws']
+        self.tokens = [sql.Token(T._lookup(path), value)
+                       for path, value in state['tokens']]
+        self._depth = state.get('depth', 0)
+        self._in_values = state.get('in_values', False)
+        if state.get('fragment') is not None:
+            part, groupable = state['fragment']
+            self.tokens = _Fragment(self.tokens, part, True, groupable)
+
     def _change_splitlevel(self, ttype, value):
         """Get the new split level (increase, decrease or remain equal)"""
         # ANSI
@@ -77,6 +142,98 @@ class StatementSplitter(object):
 
     def process(self, stream):
         """Process the stream"""
+        for tokens in self._split(stream, sql.Token,
+                                  max_tokens=self.max_tokens):
+            yield _statement(tokens)
+
+    def feed(self, stream, final=False):
+        """Like :meth:`process`, but for a stream that arrives in pieces.
+
+        The last statement of *stream* is kept back until more tokens
+        are fed, pass ``final=True`` with the last piece to flush it.
+        """
+        for tokens in self._split(stream, sql.Token, final, self.max_tokens):
+            yield _statement(tokens)
+
+    def split(self, stream):
+        """Split the stream into statement strings.
+
+        The split points are the same as those of :meth:`process`, but
+        no tokens or statements are created.
+        """
+        for values in self._split(stream, lambda ttype, value: value):
+            yield u''.join(values)
+
+    def split_spans(self, stream, source, encoding=None):
+        """Split a stream of ``(ttype, start, end)`` triples into
+        statements and yield their ``(start, end)`` offsets.
+
+        *source* is only sliced for keywords and punctuation. If
+        *encoding* is given, the offsets are byte offsets into *source*
+        and the slices are decoded.
+        """
+        stop = [0]
+        needs_value = {}
+
+        def pairs():
+            for ttype, start, end in stream:
+                stop[0] = end
+                try:
+                    needed = needs_value[ttype]
+                except KeyError:
+                    needed = needs_value[ttype] = (
+                        ttype in T.Keyword or ttype is T.Punctuation)
+                if needed:
+                    value = source[start:end]
+                    if encoding is not None:
+                        value = value.decode(encoding)
+                    yield ttype, value
+                else:
+                    yield ttype, None
+
+        start = 0
+        for ends in self._split(pairs(), lambda ttype, value: stop[0]):
+            yield start, ends[-1]
+            start = ends[-1]
+
+    def _cut(self):
+        """Removes and returns the first part of the pending tokens.
+
+        The cut is made behind the last comma between two rows of a
+        ``VALUES`` list, unless that leaves more than half of the tokens.
+        Then all tokens are returned and neither the returned part nor
+        the rest can be grouped.
+        """
+        tokens = self.tokens
+        depth, in_values = self._depth, self._in_values
+        cut = 0
+        for i, token in enumerate(tokens):
+            if token.ttype is T.Punctuation:
+                if token.value == '(':
+                    depth += 1
+                elif token.value == ')':
+                    depth -= 1
+                elif token.value == ',' and depth == 0 and in_values:
+                    cut = i + 1
+            elif token.is_keyword and token.normalized == 'VALUES':
+                in_values = True
+
+        if isinstance(tokens, _Fragment):
+            part, start_ok = tokens.part, tokens.groupable
+        else:
+            part, start_ok = 0, True
+        if cut and cut >= len(tokens) // 2:
+            self.tokens = _Fragment(tokens[cut:], part + 1, True, True)
+            self._depth, self._in_values = 0, True
+            return _Fragment(tokens[:cut], part, False, start_ok)
+        self.tokens = _Fragment((), part + 1, True, False)
+        self._depth, self._in_values = depth, in_values
+        return _Fragment(tokens, part, False, False)
+
+    def _split(self, stream, make_token, final=True, max_tokens=None):
+        """Yields lists of ``make_token(ttype, value)``, one per
+        statement. Unless *final* is true the last one is kept. Lists
+        longer than *max_tokens* are cut by :meth:`_cut`."""
         EOS_TTYPE = T.Whitespace, T.Comment.Single
 
         # Run over all stream tokens
@@ -86,21 +243,25 @@ class StatementSplitter(object):
             # whitespace ignores newlines.
             # why don't multi line comments also count?
             if self.consume_ws and ttype not in EOS_TTYPE:
-                yield sql.Statement(self.tokens)
+                yield self.tokens
 
                 # Reset filter and prepare to process next statement
                 self._reset()
 
+            if max_tokens is not None and len(self.tokens) >= max_tokens:
+                yield self._cut()
+
             # Change current split level (increase, decrease or remain equal)
             self.level += self._change_splitlevel(ttype, value)
 
             # Append the token to the current statement
-            self.tokens.append(sql.Token(ttype, value))
+            self.tokens.append(make_token(ttype, value))
 
             # Check if we get the end of a statement
             if self.level <= 0 and ttype is T.Punctuation and value == ';':
                 self.consume_ws = True
 
         # Yield pending statement (if any)
-        if self.tokens:
-            yield sql.Statement(self.tokens)
+        if final and self.tokens:
+            yield self.tokens
+            self._reset()
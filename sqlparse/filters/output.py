@@ -28,7 +28,8 @@ class OutputFilter(object):
             varname = self.varname
 
         has_nl = len(text_type(stmt).strip().splitlines()) > 1
-        stmt.tokens = self._process(stmt.tokens, varname, has_nl)
+        # Line breaks inserted into groups need quoting too.
+        stmt.tokens = self._process(list(stmt.flatten()), varname, has_nl)
         return stmt
 
 
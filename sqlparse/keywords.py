@@ -13,21 +13,55 @@ from sqlparse import tokens
 DB = "BIGQUERY"
 
 
-def is_keyword(value):
-    val = value.upper()
-    if DB == "BIGQUERY":
-        return (KEYWORDS_COMMON.get(val) or
-                KEYWORDS_CTE.get(val) or 
-                KEYWORDS_BIGQUERY_BUILTIN.get(val) or
-                KEYWORDS_BIGQUERY_FUNCTIONS.get(val) or
-                KEYWORDS_BIGQUERY.get(val, tokens.Name)), value
+#: Maximum number of words remembered by :func:`is_keyword`.
+KEYWORD_CACHE_SIZE = 4096
+
+# Per database: the merged keyword table and a cache of recently looked
+# up words. Both are built on first use.
+_LOOKUPS = {}
+
 
+def _keyword_tables(db):
+    """Returns the keyword tables of *db* in order of precedence."""
+    if db == "BIGQUERY":
+        return (KEYWORDS_COMMON, KEYWORDS_CTE, KEYWORDS_BIGQUERY_BUILTIN,
+                KEYWORDS_BIGQUERY_FUNCTIONS, KEYWORDS_BIGQUERY)
     else:
-        return (KEYWORDS_COMMON.get(val) or
-                KEYWORDS_CTE.get(val) or
-                KEYWORDS_ORACLE.get(val) or
-                KEYWORDS_PLPGSQL.get(val) or
-                KEYWORDS.get(val, tokens.Name)), value
+        return (KEYWORDS_COMMON, KEYWORDS_CTE, KEYWORDS_ORACLE,
+                KEYWORDS_PLPGSQL, KEYWORDS)
+
+
+def merge_keywords(tables):
+    """Merges keyword tables into one, earlier tables take precedence."""
+    merged = {}
+    for table in reversed(tables):
+        merged.update(table)
+    return merged
+
+
+def lookup_keyword(keywords, cache, value):
+    """Looks up *value* in the merged table *keywords*.
+
+    Results are remembered in *cache*, which is emptied once it holds
+    ``KEYWORD_CACHE_SIZE`` words.
+    """
+    try:
+        return cache[value], value
+    except KeyError:
+        ttype = keywords.get(value.upper(), tokens.Name)
+        if len(cache) >= KEYWORD_CACHE_SIZE:
+            cache.clear()
+        cache[value] = ttype
+        return ttype, value
+
+
+def is_keyword(value):
+    try:
+        keywords, cache = _LOOKUPS[DB]
+    except KeyError:
+        keywords = merge_keywords(_keyword_tables(DB))
+        keywords, cache = _LOOKUPS.setdefault(DB, (keywords, {}))
+    return lookup_keyword(keywords, cache, value)
 
 
 SQL_REGEX = {
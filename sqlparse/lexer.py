@@ -13,10 +13,533 @@
 # It's separated from the rest of pygments to increase performance
 # and to allow some customizations.
 
+import codecs
+import io
+import marshal
+import mmap
+import os
+import re
+import sys
+
 from sqlparse import tokens
-from sqlparse.keywords import SQL_REGEX
-from sqlparse.compat import bytes_type, text_type, file_types
-from sqlparse.utils import consume
+from sqlparse.compat import (bytes_type, text_type, file_types, unichr,
+                             sre_constants as sre, sre_parse)
+
+# Numbered backreferences (``\1``) have to be shifted when a rule is
+# embedded into the combined pattern. Escaped backslashes are matched too,
+# so that ``\\1`` isn't mistaken for a reference.
+_BACKREF = re.compile(r'\\(\\|[1-9]\d?)')
+
+
+def _shift_backrefs(pattern, offset):
+    def repl(m):
+        ref = m.group(1)
+        if ref == '\\':
+            return m.group()
+        return '(?:\\{0})'.format(int(ref) + offset)
+    return _BACKREF.sub(repl, pattern)
+
+
+ASCII = [chr(i) for i in range(128)]
+
+_CATEGORIES = {
+    'CATEGORY_DIGIT': r'\d', 'CATEGORY_NOT_DIGIT': r'\D',
+    'CATEGORY_SPACE': r'\s', 'CATEGORY_NOT_SPACE': r'\S',
+    'CATEGORY_WORD': r'\w', 'CATEGORY_NOT_WORD': r'\W',
+}
+
+
+class _AnyChar(Exception):
+    """Raised when the first character of a pattern can't be narrowed."""
+
+
+def _matching_ascii(pattern, flags):
+    match = re.compile(pattern, flags).match
+    return set(c for c in ASCII if match(c))
+
+
+def _charset(items, flags):
+    # The pieces are unicode, ranges may reach beyond ASCII. Python 2
+    # names the categories in lower case.
+    parts = []
+    for op, av in items:
+        if op is sre.NEGATE:
+            parts.insert(0, u'^')
+        elif op is sre.LITERAL:
+            parts.append(re.escape(unichr(av)))
+        elif op is sre.RANGE:
+            parts.append(u'{0}-{1}'.format(*map(re.escape, map(unichr, av))))
+        elif op is sre.CATEGORY and str(av).upper() in _CATEGORIES:
+            parts.append(_CATEGORIES[str(av).upper()])
+        else:
+            raise _AnyChar
+    return _matching_ascii(u'[{0}]'.format(u''.join(parts)), flags)
+
+
+def _first(seq, flags):
+    """Returns the ASCII characters a parsed pattern can start with and
+    whether the pattern can match the empty string."""
+    chars = set()
+    for op, av in seq:
+        nullable = False
+        if op is sre.LITERAL:
+            chars |= _matching_ascii(re.escape(unichr(av)), flags)
+        elif op is sre.IN:
+            chars |= _charset(av, flags)
+        elif op is sre.BRANCH:
+            nullable = False
+            for branch in av[1]:
+                first, empty = _first(branch, flags)
+                chars |= first
+                nullable = nullable or empty
+        elif op is sre.SUBPATTERN or op is getattr(sre, 'ATOMIC_GROUP', 0):
+            if op is sre.SUBPATTERN and len(av) == 4 and (av[1] or av[2]):
+                raise _AnyChar  # scoped flags
+            first, nullable = _first(av[-1], flags)
+            chars |= first
+        elif op in (sre.MAX_REPEAT, sre.MIN_REPEAT,
+                    getattr(sre, 'POSSESSIVE_REPEAT', 0)):
+            first, nullable = _first(av[2], flags)
+            chars |= first
+            nullable = nullable or av[0] == 0
+        elif op in (sre.AT, sre.ASSERT, sre.ASSERT_NOT):
+            # Zero-width. Ignoring a lookaround only widens the result.
+            nullable = True
+        else:
+            raise _AnyChar
+        if not nullable:
+            return chars, False
+    return chars, True
+
+
+def first_chars(pattern, flags=0):
+    """Returns the set of ASCII characters *pattern* can match at the
+    start of a token or ``None`` if that set can't be narrowed down."""
+    try:
+        chars, nullable = _first(sre_parse.parse(pattern, flags), flags)
+    except _AnyChar:
+        return None
+    return None if nullable else frozenset(chars)
+
+
+def _no_match(text, pos):
+    return None
+
+
+class RuleTable(object):
+    """Compiled form of a lexer rule table like ``SQL_REGEX``.
+
+    All rules are joined into a single alternation of named groups. The
+    regex engine tries the alternatives in order, so the first rule that
+    matches at a position wins -- exactly like trying the rules one after
+    another, but without leaving C for every failed attempt.
+
+    In addition each ASCII character is mapped to a combined pattern of
+    only those rules that can match a token starting with it (see
+    :func:`first_chars`). Other characters fall back to the full table.
+    These patterns are compiled when a token starts with one of their
+    characters for the first time. If *cache_dir* is given, the mapping
+    is stored there and reused by later processes.
+    """
+
+    def __init__(self, rules, flags=None, cache_dir=None):
+        if flags is None:
+            from sqlparse.keywords import FLAGS as flags
+        self.flags = flags
+        self.patterns = [rexmatch.__self__ for rexmatch, _ in rules]
+        self.actions = dict(('r{0}'.format(idx), action)
+                            for idx, (_, action) in enumerate(rules))
+        self.match = self._compile(range(len(rules)))
+
+        index = None
+        if cache_dir:
+            key = (int(self.flags),
+                   [regex.pattern for regex in self.patterns])
+            path = os.path.join(cache_dir, _cache_name(key))
+            index = _read_index(path, key)
+        if index is None:
+            index = self._first_char_index()
+            if cache_dir:
+                _write_index(path, key, index)
+        self.dispatch = self._build_dispatch(index)
+
+    def _compile(self, indices):
+        if not indices:
+            return _no_match
+        parts = []
+        ngroups = 0
+        for idx in indices:
+            regex = self.patterns[idx]
+            pattern = _shift_backrefs(regex.pattern, ngroups + 1)
+            parts.append('(?P<r{0}>{1})'.format(idx, pattern))
+            ngroups += regex.groups + 1
+        return re.compile('|'.join(parts), self.flags).match
+
+    def _first_char_index(self):
+        """Maps each ASCII character to the indices of the rules that
+        can match a token starting with it."""
+        firsts = [first_chars(regex.pattern, self.flags)
+                  for regex in self.patterns]
+        return dict((char, tuple(idx for idx, first in enumerate(firsts)
+                                 if first is None or char in first))
+                    for char in ASCII)
+
+    def _build_dispatch(self, index):
+        chars = {}
+        for char, indices in index.items():
+            chars.setdefault(indices, []).append(char)
+        dispatch = {}
+        for indices, group in chars.items():
+            match = self._lazy_compile(dispatch, indices, group)
+            dispatch.update((char, match) for char in group)
+        return dispatch
+
+    def _lazy_compile(self, dispatch, indices, chars):
+        def match(text, pos):
+            compiled = self._compile(indices)
+            dispatch.update((char, compiled) for char in chars)
+            return compiled(text, pos)
+        return match
+
+    def get_tokens(self, text):
+        """Split ``text`` into (tokentype, value) pairs."""
+        default = self.match
+        dispatch = self.dispatch
+        actions = self.actions
+        _TokenType = tokens._TokenType
+
+        pos, end = 0, len(text)
+        while pos < end:
+            m = dispatch.get(text[pos], default)(text, pos)
+            if m is None:
+                yield tokens.Error, text[pos]
+                pos += 1
+                continue
+
+            action = actions[m.lastgroup]
+            if isinstance(action, _TokenType):
+                yield action, m.group()
+            elif callable(action):
+                yield action(m.group())
+            pos = m.end()
+
+    def get_spans(self, text):
+        """Split ``text`` into (tokentype, start, end) triples.
+
+        Values are only sliced out of ``text`` for rules that need them
+        to decide on the token type (i.e. keywords).
+        """
+        default = self.match
+        dispatch = self.dispatch
+        actions = self.actions
+        _TokenType = tokens._TokenType
+
+        pos, end = 0, len(text)
+        while pos < end:
+            m = dispatch.get(text[pos], default)(text, pos)
+            if m is None:
+                yield tokens.Error, pos, pos + 1
+                pos += 1
+                continue
+
+            action = actions[m.lastgroup]
+            stop = m.end()
+            if isinstance(action, _TokenType):
+                yield action, pos, stop
+            elif callable(action):
+                yield action(text[pos:stop])[0], pos, stop
+            pos = stop
+
+
+#: Number of characters read from file-like objects at once.
+CHUNK_SIZE = 64 * 1024
+
+#: Number of characters that must follow a token before it is emitted
+#: while more input is expected. Rules may peek past the end of their
+#: match (lookaheads, ``LEFT OUTER JOIN`` etc.), this is their budget.
+LOOKAHEAD = 1024
+
+#: Number of characters kept in front of the text that is still to be
+#: lexed, for the lookbehinds of the rules (``(?<!\w)`` etc.).
+LOOKBEHIND = 1
+
+# The bodies of tokens that can grow to any length. These mirror the
+# string, comment and dollar quote rules in SQL_REGEX but don't require
+# the closing delimiter. If one of them runs up to the end of the
+# buffer, the token isn't complete yet.
+_OPEN_TOKEN = re.compile(r"""
+    '(?:''|\\\\|\\'|[^'])*
+  | "(?:""|\\\\|\\"|[^"])*
+  | `(?:``|[^`])*
+  | ´(?:´´|[^´])*
+  | /\*(?:[^*]|\*(?!/))*
+  | (?:--|\#\ )[^\r\n]*
+  | (\$(?:[_A-ZÀ-Ü]\w*)?\$)(?:(?!\1)[\s\S])*
+""", re.VERBOSE | re.IGNORECASE | re.UNICODE)
+_OPEN_CHARS = frozenset(u"'\"`´/-#$")
+
+
+class IncrementalLexer(object):
+    """Tokenizes text that arrives in pieces.
+
+    Text is passed to :meth:`feed`, which yields the tokens that can't
+    change anymore when more text follows. Everything after them is kept
+    in a buffer until the next call, so memory use is bounded by the
+    size of the pieces plus the longest single token or run of
+    whitespace. *context* is the text in front of the first piece, if
+    lexing starts in the middle of a text.
+    """
+
+    def __init__(self, rules=None, lookahead=LOOKAHEAD, context=u''):
+        self.rules = rules or get_rules()
+        self.lookahead = lookahead
+        # The buffer starts with the last characters already lexed.
+        self._buffer = context[len(context) - LOOKBEHIND:]
+        self._start = len(self._buffer)
+        self._pending = []
+        self._npending = 0
+
+    def feed(self, text, final=False):
+        """Adds *text* and yields complete (tokentype, value) pairs.
+
+        Pass ``final=True`` with the last piece (which may be empty) to
+        flush the buffer.
+        """
+        self._pending.append(text)
+        self._npending += len(text)
+        # Waiting for the end of a long token. Grow the buffer
+        # geometrically instead of rescanning it for every piece.
+        if not final and self._npending < len(self._buffer) - self._start:
+            return
+
+        buf = self._buffer + u''.join(self._pending)
+        self._pending = []
+        self._npending = 0
+
+        default = self.rules.match
+        dispatch = self.rules.dispatch
+        actions = self.rules.actions
+        open_token = _OPEN_TOKEN.match
+        _TokenType = tokens._TokenType
+
+        pos, end = self._start, len(buf)
+        # Rules skip any amount of whitespace (``(?=\s*\.)``,
+        # ``LEFT\s+JOIN``), a token followed only by whitespace may
+        # still change.
+        safe_end = min(end - self.lookahead, len(buf.rstrip()) - 1)
+        while pos < end:
+            if not final:
+                if pos > safe_end:
+                    break
+                if buf[pos] in _OPEN_CHARS:
+                    m = open_token(buf, pos)
+                    if m is not None and m.end() == end:
+                        break
+
+            m = dispatch.get(buf[pos], default)(buf, pos)
+            if m is None:
+                yield tokens.Error, buf[pos]
+                pos += 1
+                continue
+            elif not final and m.end() > safe_end:
+                break
+
+            action = actions[m.lastgroup]
+            if isinstance(action, _TokenType):
+                yield action, m.group()
+            elif callable(action):
+                yield action(m.group())
+            pos = m.end()
+
+        keep = max(0, pos - LOOKBEHIND)
+        self._buffer = buf[keep:]
+        self._start = pos - keep
+
+
+def tokenize_stream(stream, encoding=None, chunk_size=CHUNK_SIZE,
+                    lexer=None):
+    """Tokenizes a file-like object, reading it in chunks of
+    *chunk_size* characters."""
+    lexer = lexer or IncrementalLexer()
+    decoder = None
+    while True:
+        chunk = stream.read(chunk_size)
+        final = not chunk
+        if isinstance(chunk, bytes_type):
+            if decoder is None:
+                decoder = codecs.getincrementaldecoder(encoding or 'utf-8')()
+            chunk = decoder.decode(chunk, final)
+        for token in lexer.feed(chunk, final):
+            yield token
+        if final:
+            break
+
+
+class _BufferReader(object):
+    """File-like view of a bytes-like object such as an ``mmap``."""
+
+    def __init__(self, buf):
+        self._buf = buf
+        self._pos = 0
+
+    def read(self, size):
+        chunk = self._buf[self._pos:self._pos + size]
+        self._pos += len(chunk)
+        return chunk
+
+
+def _byte_length(encoding):
+    """Returns the byte order mark of *encoding* and a function
+    computing the encoded length of a string without it."""
+    encode = codecs.getincrementalencoder(encoding)().encode
+    # The mark is written once, in front of the first string.
+    bom = encode(u'')
+    isascii = getattr(text_type, 'isascii', None)
+    if isascii is None or encode(u'az09') != b'az09':
+        return bom, lambda value: len(encode(value))
+    return bom, lambda value: (len(value) if isascii(value)
+                               else len(encode(value)))
+
+
+def tokenize_buffer(buf, encoding=None, chunk_size=CHUNK_SIZE,
+                    dialect=None, coalesce_whitespace=False):
+    """Tokenizes a bytes-like object, e.g. an ``mmap``.
+
+    The buffer is decoded region by region. Yields ``(tokentype, start,
+    end)`` triples where *start* and *end* are byte offsets into *buf*.
+    """
+    encoding = encoding or 'utf-8'
+    bom, byte_length = _byte_length(encoding)
+    # The decoder skips a byte order mark in either byte order.
+    offset = len(bom) if buf[:len(bom)] in (bom, bom[::-1]) else 0
+    lexer = IncrementalLexer(get_rules(dialect, coalesce_whitespace))
+    for ttype, value in tokenize_stream(_BufferReader(buf), encoding,
+                                        chunk_size, lexer):
+        start = offset
+        offset += byte_length(value)
+        yield ttype, start, offset
+
+
+def tokenize_file(path, encoding=None, dialect=None,
+                  coalesce_whitespace=False):
+    """Tokenizes the file at *path* by memory-mapping it.
+
+    Yields ``(tokentype, start, end)`` triples of byte offsets into the
+    file, see :func:`tokenize_buffer`.
+    """
+    with io.open(path, 'rb') as f:
+        try:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty files can't be mapped
+            return
+        stream = tokenize_buffer(buf, encoding, dialect=dialect,
+                                 coalesce_whitespace=coalesce_whitespace)
+        try:
+            for token in stream:
+                yield token
+        finally:
+            buf.close()
+
+
+#: Directory where compiled rule tables are cached between processes.
+#: Taken from the ``SQLPARSE_CACHE_DIR`` environment variable, caching
+#: is disabled if it's not set.
+CACHE_DIR = os.environ.get('SQLPARSE_CACHE_DIR')
+
+# Rule tables for keywords.SQL_REGEX, keyed by coalesce_whitespace.
+_RULES = {}
+
+
+def _cache_name(key):
+    import zlib
+    from sqlparse import __version__
+    checksum = zlib.crc32(repr(key).encode('utf-8')) & 0xffffffff
+    return 'sqlparse-{0}-py{1}{2}-{3:08x}.rules'.format(
+        __version__, sys.version_info[0], sys.version_info[1], checksum)
+
+
+def _read_index(path, key):
+    """Loads a first character index written by :func:`_write_index`.
+
+    Returns ``None`` if the file is missing, broken or has been written
+    for other rules.
+    """
+    try:
+        with io.open(path, 'rb') as f:
+            stored_key, index = marshal.loads(f.read())
+    except (IOError, OSError, EOFError, ValueError, TypeError):
+        return None
+    if stored_key != key:
+        return None
+    return index
+
+
+def _write_index(path, key, index):
+    import tempfile
+    try:
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+    except (IOError, OSError):
+        return
+    try:
+        with io.open(fd, 'wb') as f:
+            f.write(marshal.dumps((key, index)))
+        os.rename(tmp, path)
+    except (IOError, OSError, ValueError):
+        os.remove(tmp)
+
+
+def _coalesce_whitespace(rules):
+    """Returns *rules* with the whitespace rule replaced by one that
+    matches whole runs of spaces and tabs instead of single
+    characters. Line breaks are still tokens of their own."""
+    coalesced = []
+    for rexmatch, action in rules:
+        if action is tokens.Whitespace:
+            regex = rexmatch.__self__
+            rexmatch = re.compile(r'[^\S\r\n]+', regex.flags).match
+        coalesced.append((rexmatch, action))
+    return coalesced
+
+
+def get_rules(dialect=None, coalesce_whitespace=False):
+    """Returns the :class:`RuleTable` for ``keywords.SQL_REGEX``.
+
+    The table (and the keywords module) is only loaded on first use,
+    so importing sqlparse stays cheap. If *dialect* is given, the rule
+    table of that dialect is returned instead (see
+    :mod:`sqlparse.dialects`). With *coalesce_whitespace* each run of
+    horizontal whitespace becomes a single token.
+    """
+    if dialect is not None:
+        from sqlparse.dialects import get_dialect
+        return get_dialect(dialect).get_rules(coalesce_whitespace)
+    try:
+        return _RULES[coalesce_whitespace]
+    except KeyError:
+        from sqlparse.keywords import SQL_REGEX
+        rules = SQL_REGEX
+        if coalesce_whitespace:
+            rules = _coalesce_whitespace(rules)
+        table = RuleTable(rules, cache_dir=CACHE_DIR)
+        return _RULES.setdefault(coalesce_whitespace, table)
+
+
+def decode(text, encoding=None):
+    """Returns *text* as a string, decoding bytes with *encoding*.
+
+    Without an encoding UTF-8 is tried first, then ``unicode-escape``.
+    """
+    if isinstance(text, text_type):
+        return text
+    elif isinstance(text, bytes_type):
+        if encoding:
+            return text.decode(encoding)
+        try:
+            return text.decode('utf-8')
+        except UnicodeDecodeError:
+            return text.decode('unicode-escape')
+    raise TypeError(u"Expected text or file-like object, got {!r}".
+                    format(type(text)))
 
 
 class Lexer(object):
@@ -25,7 +548,8 @@ class Lexer(object):
     """
 
     @staticmethod
-    def get_tokens(text, encoding=None):
+    def get_tokens(text, encoding=None, dialect=None,
+                   coalesce_whitespace=False):
         """
         Return an iterable of (tokentype, value) pairs generated from
         `text`. If `unfiltered` is set to `True`, the filtering mechanism
@@ -38,45 +562,34 @@ class Lexer(object):
 
         ``stack`` is the initial stack (default: ``['root']``)
         """
+        rules = get_rules(dialect, coalesce_whitespace)
         if isinstance(text, file_types):
-            text = text.read()
-
-        if isinstance(text, text_type):
-            pass
-        elif isinstance(text, bytes_type):
-            if encoding:
-                text = text.decode(encoding)
-            else:
-                try:
-                    text = text.decode('utf-8')
-                except UnicodeDecodeError:
-                    text = text.decode('unicode-escape')
-        else:
-            raise TypeError(u"Expected text or file-like object, got {!r}".
-                            format(type(text)))
-
-        iterable = enumerate(text)
-        for pos, char in iterable:
-            for rexmatch, action in SQL_REGEX:
-                m = rexmatch(text, pos)
-
-                if not m:
-                    continue
-                elif isinstance(action, tokens._TokenType):
-                    yield action, m.group()
-                elif callable(action):
-                    yield action(m.group())
-
-                consume(iterable, m.end() - pos - 1)
-                break
-            else:
-                yield tokens.Error, char
+            lexer = IncrementalLexer(rules)
+            for token in tokenize_stream(text, encoding, lexer=lexer):
+                yield token
+            return
+
+        for token in rules.get_tokens(decode(text, encoding)):
+            yield token
 
 
-def tokenize(sql, encoding=None):
+def tokenize(sql, encoding=None, dialect=None, coalesce_whitespace=False):
     """Tokenize sql.
 
     Tokenize *sql* using the :class:`Lexer` and return a 2-tuple stream
-    of ``(token type, value)`` items.
+    of ``(token type, value)`` items. If *coalesce_whitespace* is true,
+    runs of spaces and tabs are returned as one token.
+    """
+    return Lexer().get_tokens(sql, encoding, dialect, coalesce_whitespace)
+
+
+def tokenize_spans(sql, dialect=None, coalesce_whitespace=False):
+    """Tokenize sql without copying token values.
+
+    Returns a stream of ``(token type, start, end)`` items, the value
+    of a token is ``sql[start:end]``. Use :func:`tokenize_buffer` for
+    encoded input.
     """
-    return Lexer().get_tokens(sql, encoding)
+    if not isinstance(sql, text_type):
+        raise TypeError(u"Expected text, got {!r}".format(type(sql)))
+    return get_rules(dialect, coalesce_whitespace).get_spans(sql)
@@ -38,6 +38,11 @@ class Token(object):
         self.is_whitespace = self.ttype in T.Whitespace
         self.normalized = value.upper() if self.is_keyword else value
 
+    def __reduce__(self):
+        # Everything else is derived from type and value again. The
+        # parent is set when the enclosing group is restored.
+        return self.__class__, (self.ttype, self.value)
+
     def __str__(self):
         return self.value
 
@@ -127,6 +132,70 @@ class Token(object):
         return False
 
 
+class SpanToken(Token):
+    """A token that references a slice of the source text.
+
+    Instead of owning a copy of its value it keeps the ``source`` string
+    and the ``start`` and ``end`` offsets, as returned by
+    :func:`~sqlparse.lexer.tokenize_spans`. The value is sliced out on
+    first access.
+    """
+
+    __slots__ = ('source', 'start', 'end')
+
+    _value = Token.value
+    _normalized = Token.normalized
+
+    def __init__(self, ttype, source, start, end):
+        self.source = source
+        self.start = start
+        self.end = end
+        self.ttype = ttype
+        self.parent = None
+        self.is_group = False
+        self.is_keyword = ttype in T.Keyword
+        self.is_whitespace = ttype in T.Whitespace
+
+    @property
+    def value(self):
+        try:
+            return self._value
+        except AttributeError:
+            self._value = value = self.source[self.start:self.end]
+            return value
+
+    @value.setter
+    def value(self, value):
+        self._value = value
+
+    @property
+    def normalized(self):
+        try:
+            return self._normalized
+        except AttributeError:
+            value = self.value
+            self._normalized = value.upper() if self.is_keyword else value
+            return self._normalized
+
+    @normalized.setter
+    def normalized(self, value):
+        self._normalized = value
+
+    def __reduce__(self):
+        # The value becomes the source, there's no need to ship the rest.
+        value = self.value
+        return self.__class__, (self.ttype, value, 0, len(value))
+
+
+def _restore_group(cls, tokens):
+    """Unpickles a group. The children are restored already, its value
+    is computed when needed as for any new group. Attributes of
+    subclasses are restored by pickle afterwards."""
+    group = cls.__new__(cls)
+    TokenList.__init__(group, tokens)
+    return group
+
+
 @unicode_compatible
 class TokenList(Token):
     """A group of tokens.
@@ -135,13 +204,79 @@ class TokenList(Token):
     list of child-tokens.
     """
 
-    __slots__ = 'tokens'
+    __slots__ = ('tokens', '_hint')
+
+    _value = Token.value
+    _normalized = Token.normalized
 
     def __init__(self, tokens=None):
         self.tokens = tokens or []
-        [setattr(token, 'parent', self) for token in tokens]
-        super(TokenList, self).__init__(None, text_type(self))
+        [setattr(token, 'parent', self) for token in self.tokens]
+        # The value is joined on first access, see value.
+        self.ttype = None
+        self.parent = None
         self.is_group = True
+        self.is_keyword = False
+        self.is_whitespace = False
+
+    @property
+    def value(self):
+        """The text of all tokens in this group. It's computed on first
+        access, creating a group doesn't copy the text below it."""
+        try:
+            return self._value
+        except AttributeError:
+            self._value = value = text_type(self)
+            return value
+
+    @value.setter
+    def value(self, value):
+        self._value = value
+
+    @property
+    def normalized(self):
+        try:
+            return self._normalized
+        except AttributeError:
+            return self.value
+
+    @normalized.setter
+    def normalized(self, value):
+        self._normalized = value
+
+    def _forget_value(self, parents=True):
+        """Drops the value of this group and, if *parents* is true, of
+        the groups containing it after its tokens were changed."""
+        group = self
+        while group is not None:
+            try:
+                del group._value
+            except AttributeError:
+                pass
+            try:
+                del group._normalized
+            except AttributeError:
+                pass
+            group = group.parent if parents else None
+
+    def __reduce__(self):
+        tokens = self.tokens
+        state = getattr(self, '__dict__', None) or None
+        return _restore_group, (self.__class__, tokens), state
+
+    def __copy__(self):
+        # The copy shares the tokens, which keep their parent.
+        group = self.__class__.__new__(self.__class__)
+        group.tokens = list(self.tokens)
+        for name in ('ttype', 'parent', 'is_group', 'is_keyword',
+                     'is_whitespace', '_value', '_normalized'):
+            try:
+                setattr(group, name, getattr(self, name))
+            except AttributeError:
+                pass
+        if hasattr(self, '__dict__'):
+            group.__dict__.update(self.__dict__)
+        return group
 
     def __str__(self):
         return u''.join(token.value for token in self.flatten())
@@ -223,7 +358,10 @@ class TokenList(Token):
                     if func(token):
                         return idx, token
         else:
-            for idx, token in enumerate(self.tokens[start:end], start=start):
+            # Indices of the slice [start:end], without copying it.
+            tokens = self.tokens
+            for idx in range(*slice(start, end).indices(len(tokens))):
+                token = tokens[idx]
                 for func in funcs:
                     if func(token):
                         return idx, token
@@ -283,7 +421,22 @@ class TokenList(Token):
     def token_index(self, token, start=0):
         """Return list index of token."""
         start = start if isinstance(start, int) else self.token_index(start)
-        return start + self.tokens[start:].index(token)
+        tokens = self.tokens
+        # Filters mostly look up tokens one after another, so the search
+        # starts where the last one was found.
+        try:
+            hint = self._hint
+        except AttributeError:
+            hint = 0
+        if start < hint:
+            try:
+                idx = tokens.index(token, hint)
+            except ValueError:
+                idx = tokens.index(token, start, hint)
+        else:
+            idx = tokens.index(token, start)
+        self._hint = idx
+        return idx
 
     def group_tokens(self, grp_cls, start, end, include_end=True,
                      extend=False):
@@ -303,7 +456,8 @@ class TokenList(Token):
             grp = start
             grp.tokens.extend(subtokens)
             del self.tokens[start_idx + 1:end_idx]
-            grp.value = text_type(start)
+            # The text of this list itself stays the same.
+            grp._forget_value(parents=False)
         else:
             subtokens = self.tokens[start_idx:end_idx]
             grp = grp_cls(subtokens)
@@ -321,6 +475,7 @@ class TokenList(Token):
             where = self.token_index(where)
         token.parent = self
         self.tokens.insert(where, token)
+        self._forget_value()
 
     def insert_after(self, where, token, skip_ws=True):
         """Inserts *token* after *where*."""
@@ -332,6 +487,7 @@ class TokenList(Token):
             self.tokens.append(token)
         else:
             self.tokens.insert(nidx, token)
+        self._forget_value()
 
     def has_alias(self):
         """Returns ``True`` if an alias is present."""
@@ -431,6 +587,83 @@ class Statement(TokenList):
         return 'UNKNOWN'
 
 
+class StatementFragment(Statement):
+    """A piece of a statement with more tokens than allowed.
+
+    See :class:`~sqlparse.engine.StatementSplitter`. ``index`` counts the
+    pieces of a statement from 0 and ``is_last`` is true for its last
+    piece. Pieces cut between the rows of a ``VALUES`` list are
+    grouped, others are passed on as flat token lists
+    (``groupable`` is false).
+    """
+
+    def __init__(self, tokens=None, index=0, is_last=True, groupable=True):
+        super(StatementFragment, self).__init__(tokens)
+        self.index = index
+        self.is_last = is_last
+        self.groupable = groupable
+
+
+class LazyStatement(Statement):
+    """A statement that is grouped when its tokens are first used.
+
+    It's returned by :func:`~sqlparse.parse` with ``lazy=True``. Until
+    ``tokens`` is accessed, directly or by any method needing the
+    groups, *group* hasn't been called and the statement holds the
+    ungrouped tokens. :meth:`get_type`, :meth:`flatten` and the text
+    of the statement don't need the groups. Tokens yielded by
+    :meth:`flatten` before grouping have the statement as parent.
+    """
+
+    _tokens = TokenList.tokens
+    _group = None
+
+    def __init__(self, tokens=None, group=None):
+        super(LazyStatement, self).__init__(tokens)
+        self._group = group
+
+    @property
+    def tokens(self):
+        group = self._group
+        if group is not None:
+            self._group = None
+            group(self)
+        return self._tokens
+
+    @tokens.setter
+    def tokens(self, tokens):
+        self._tokens = tokens
+
+    def flatten(self):
+        if self._group is None:
+            tokens = self._tokens
+        else:
+            # No groups yet. Grouping may start while this is iterated.
+            tokens = list(self._tokens)
+        for token in tokens:
+            if token.is_group:
+                for item in token.flatten():
+                    yield item
+            else:
+                yield token
+
+    def get_type(self):
+        if self._group is not None:
+            # Grouping doesn't touch the first keyword, only a CTE
+            # needs the identifiers following it.
+            for token in self._tokens:
+                if token.is_whitespace or token.ttype in T.Comment:
+                    continue
+                elif token.ttype in (T.Keyword.DML, T.Keyword.DDL):
+                    return token.normalized
+                elif token.ttype != T.Keyword.CTE:
+                    return 'UNKNOWN'
+                break
+            else:
+                return 'UNKNOWN'
+        return super(LazyStatement, self).get_type()
+
+
 class Identifier(TokenList):
     """Represents an identifier.
 
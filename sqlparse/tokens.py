@@ -12,25 +12,69 @@
 
 """Tokens"""
 
+import itertools
+
+_ids = itertools.count()
+
 
 class _TokenType(tuple):
     parent = None
+    # Every type created by attribute access has a unique id and knows
+    # the ids of its ancestors (including itself), so that checking for
+    # a subtype is a set lookup.
+    _id = None
+    _ancestry = None
+
+    def __init__(self, path=()):
+        # Types created directly share the ids of the type with the
+        # same path, so they can be used like it.
+        ttype = _lookup(path)
+        self.parent = ttype.parent
+        self._id = ttype._id
+        self._ancestry = ttype._ancestry
 
     def __contains__(self, item):
-        return item is not None and (self is item or item[:len(self)] == self)
+        try:
+            return self._id in item._ancestry
+        except (AttributeError, TypeError):
+            return item is not None and item[:len(self)] == self
 
     def __getattr__(self, name):
-        new = _TokenType(self + (name,))
-        setattr(self, name, new)
+        if name.startswith('__'):
+            raise AttributeError(name)
+        new = tuple.__new__(_TokenType, self + (name,))
         new.parent = self
+        new._id = next(_ids)
+        new._ancestry = self._ancestry | frozenset([new._id])
+        setattr(self, name, new)
         return new
 
     def __repr__(self):
         # self can be False only if its the `root` i.e. Token itself
         return 'Token' + ('.' if self else '') + '.'.join(self)
 
+    # Token types are singletons, copies and unpickled types are looked
+    # up by their path.
+    def __reduce__(self):
+        return _lookup, (tuple(self),)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+def _lookup(path):
+    ttype = Token
+    for name in path:
+        ttype = getattr(ttype, name)
+    return ttype
+
 
-Token = _TokenType()
+Token = tuple.__new__(_TokenType)
+Token._id = next(_ids)
+Token._ancestry = frozenset([Token._id])
 
 # Special token types
 Text = Token.Text
@@ -65,6 +65,9 @@ def remove_quotes(val):
 def recurse(*cls):
     """Function decorator to help with recursion
 
+    The undecorated function and *cls* are kept as ``level`` and
+    ``skip`` attributes of the returned function.
+
     :param cls: Classes to not recurse over
     :return: function
     """
@@ -75,6 +78,8 @@ def recurse(*cls):
                     wrapped_f(sgroup)
             f(tlist)
 
+        wrapped_f.level = f
+        wrapped_f.skip = cls
         return wrapped_f
 
     return wrap
@@ -47,3 +47,16 @@ def get_stream(filepath):
         return io.open(filepath(filename), encoding=encoding)
 
     return make_stream
+
+
+@pytest.fixture()
+def tree():
+    """Returns the groups of a token list as nested lists of class name,
+    token type and value, for comparing parse results."""
+
+    def make_tree(tlist):
+        return [(type(token).__name__, token.ttype,
+                 make_tree(token) if token.is_group else token.value)
+                for token in tlist.tokens]
+
+    return make_tree
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+
+import sys
+
+import pytest
+
+import sqlparse
+
+if sys.version_info < (3, 6):
+    pytest.skip('requires Python 3.6', allow_module_level=True)
+
+import asyncio  # noqa: E402
+from concurrent.futures import ProcessPoolExecutor  # noqa: E402
+
+from sqlparse import aio  # noqa: E402
+
+
+class Chunks(object):
+    """Asynchronous iterator over pieces of *data*."""
+
+    def __init__(self, data, size):
+        self.pieces = [data[i:i + size] for i in range(0, len(data), size)]
+
+    def __aiter__(self):
+        return self
+
+    def __anext__(self):
+        if not self.pieces:
+            raise StopAsyncIteration
+        future = asyncio.get_event_loop().create_future()
+        future.set_result(self.pieces.pop(0))
+        return future
+
+
+def run(make_agen):
+    loop = asyncio.new_event_loop()
+    try:
+        asyncio.set_event_loop(loop)
+        agen = make_agen()
+        stmts = []
+        while True:
+            try:
+                stmts.append(loop.run_until_complete(agen.__anext__()))
+            except StopAsyncIteration:
+                return stmts
+    finally:
+        asyncio.set_event_loop(None)
+        loop.close()
+
+
+@pytest.fixture()
+def sql(load_file):
+    return load_file('function_psql.sql') + (
+        u"\nselect 'a;b', 'ä' ; select 2;\n-- comment\n")
+
+
+@pytest.mark.parametrize('size', [1, 7, 100000])
+@pytest.mark.parametrize('encode', [False, True])
+def test_parsestream_chunks(sql, size, encode, tree):
+    data = sql.encode('utf-8') if encode else sql
+    stmts = run(lambda: aio.parsestream(Chunks(data, size), max_pending=1))
+    assert [tree(stmt) for stmt in stmts] == [
+        tree(stmt) for stmt in sqlparse.parse(sql)]
+
+
+def test_parsestream_reader(sql, tree):
+    def parsestream():
+        reader = asyncio.StreamReader()
+        reader.feed_data(sql.encode('utf-8'))
+        reader.feed_eof()
+        return aio.parsestream(reader, executor=executor, chunk_size=5,
+                               dialect='oracle')
+
+    with ProcessPoolExecutor(1) as executor:
+        stmts = run(parsestream)
+    assert [tree(stmt) for stmt in stmts] == [
+        tree(stmt) for stmt in sqlparse.parse(sql, dialect='oracle')]
+
+
+def test_parsestream_yields_early():
+    loop = asyncio.new_event_loop()
+    reader = asyncio.StreamReader(loop=loop)
+    reader.feed_data(b'select 1; select 2; ' + b' ' * 2000)
+    agen = aio.parsestream(reader)
+    try:
+        # The end of the stream isn't needed for the first statement.
+        stmt = loop.run_until_complete(
+            asyncio.wait_for(agen.__anext__(), 10))
+        assert str(stmt) == 'select 1; '
+        reader.feed_eof()
+        stmt = loop.run_until_complete(agen.__anext__())
+        assert str(stmt).strip() == 'select 2;'
+    finally:
+        loop.close()
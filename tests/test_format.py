@@ -434,6 +434,12 @@ class TestFormatReindent(object):
             '       baz',
             'from table1, table2',
             'where 1 = 2'])
+        # Widths are measured before whitespace is stripped, as always.
+        s = 'select x    as    a, y    as    b, z from t'
+        assert f(s) == '\n'.join([
+            'select x as a,',
+            '       y as b, z',
+            'from t'])
 
     def test_identifier_list_comment_first(self):
         f = lambda sql: sqlparse.format(sql, reindent=True, comma_first=True)
@@ -553,6 +559,19 @@ class TestOutputFormat(object):
             "sql = ('select * '",
             "       'from foo;')"])
 
+    def test_python_filtered_groups(self):
+        sql = 'select a from t where x = 1 /* d */ and y = 2'
+        f = lambda sql: sqlparse.format(sql, output_format='python',
+                                        strip_comments=True)
+        assert f(sql) == "sql = 'select a from t where x = 1 and y = 2'"
+        f = lambda sql: sqlparse.format(sql, output_format='python',
+                                        reindent=True)
+        assert f(sql) == '\n'.join([
+            "sql = ('select a '",
+            "       'from t  '",
+            "       'where x = 1 /* d */  '",
+            "       '  and y = 2')"])
+
     def test_python_multiple_statements(self):
         sql = 'select * from foo; select 1 from dual'
         f = lambda sql: sqlparse.format(sql, output_format='python')
@@ -651,3 +670,68 @@ def test_format_right_margin_invalid_option(right_margin):
 def test_format_right_margin():
     # TODO: Needs better test, only raises exception right now
     sqlparse.format('foo', right_margin="79")
+
+
+@pytest.mark.parametrize('options', [
+    {},
+    {'reindent': True},
+    {'reindent_aligned': True},
+    {'strip_whitespace': True, 'strip_comments': True},
+    {'output_format': 'php', 'reindent': True},
+    {'use_space_around_operators': True, 'keyword_case': 'upper'},
+])
+@pytest.mark.parametrize('fn', ['function_psql.sql', 'huge_select.sql',
+                                'begintag.sql', 'dashcomment.sql'])
+def test_format_coalesce_whitespace(load_file, fn, options):
+    sql = load_file(fn)
+    sql += '\nselect  a  ,\t\tb  from  ( select  1 )  t  where  x  =  1  ;  '
+    assert sqlparse.format(sql, coalesce_whitespace=True, **options) == (
+        sqlparse.format(sql, **options))
+
+
+@pytest.mark.parametrize('coalesce_whitespace', [False, True])
+@pytest.mark.parametrize('sql, options, expected', [
+    (':p , from asc', {'reindent': True}, ':p, from asc'),
+    ('select a   , b from t', {'strip_whitespace': True},
+     'select a , b from t'),
+    ('select a\n  , b from t', {'strip_whitespace': True},
+     'select a , b from t'),
+    ('select (  select  1  )  as x  ', {'strip_whitespace': True},
+     'select ( select 1 ) as x'),
+    (';   --c\n  \nbegin', {'reindent': True}, '; --c\n\n\nbegin'),
+])
+def test_format_whitespace_runs(sql, options, expected, coalesce_whitespace):
+    # Filters remove single whitespace characters of a run, in both modes.
+    assert sqlparse.format(sql, coalesce_whitespace=coalesce_whitespace,
+                           **options) == expected
+
+
+@pytest.mark.parametrize('options', [
+    {'reindent': True},
+    {'reindent_aligned': True},
+    {'output_format': 'python', 'reindent': True},
+    {'strip_comments': True, 'keyword_case': 'upper'},
+])
+def test_format_many(load_file, options):
+    queries = [load_file(fn) for fn in ['function_psql.sql', 'begintag.sql',
+                                        'dashcomment.sql']]
+    queries += ['select a, b from t; select 1', 'select 2']
+    expected = [sqlparse.format(sql, **options) for sql in queries]
+    assert list(sqlparse.format_many(queries, **options)) == expected
+    pytest.importorskip('concurrent.futures')
+    assert list(sqlparse.format_many(queries, workers=2, chunk_size=2,
+                                     **options)) == expected
+
+
+def test_format_many_is_lazy():
+    def queries():
+        yield 'select 1'
+        raise AssertionError('consumed too early')
+
+    formatted = sqlparse.format_many(queries(), keyword_case='upper')
+    assert next(formatted) == 'SELECT 1'
+
+
+def test_format_many_invalid_option():
+    with pytest.raises(SQLParseError):
+        sqlparse.format_many([], reindent=2)
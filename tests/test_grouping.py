@@ -547,3 +547,56 @@ def test_aliased_literal_without_as():
     p = sqlparse.parse('1 foo')[0].tokens
     assert len(p) == 1
     assert p[0].get_alias() == 'foo'
+
+
+@pytest.mark.parametrize('s', [
+    'select (a as b)::int, x::int::text as y from t',
+    'select * from t where a.b = 1 and c < d + 2 order by c desc, e',
+    'select [a].b, x[1], f(x).y z from t -- c\nwhere x = 1',
+    'select case when a = 1 then b else c end as d, count(*) over (x)',
+    'update t set a = b /* c */, d := e where f is not null',
+    'select a, /* b */ c, 1 foo, (select 1) bar',
+    'insert into t (a, b) values (1, 2), (3 * 4, f(5))',
+])
+def test_grouping_fused(s, tree):
+    from sqlparse.engine import grouping
+
+    stmt = sqlparse.parse(s)[0]
+    tokens = sqlparse.lexer.tokenize(s)
+    expected = sqlparse.engine.StatementSplitter().process(tokens)
+    expected = next(expected)
+    for func in [
+            grouping.group_comments, grouping.group_brackets,
+            grouping.group_parenthesis, grouping.group_case,
+            grouping.group_if, grouping.group_for, grouping.group_begin,
+            grouping.group_functions, grouping.group_where,
+            grouping.group_period, grouping.group_arrays,
+            grouping.group_identifier, grouping.group_order,
+            grouping.group_typecasts, grouping.group_operator,
+            grouping.group_comparison, grouping.group_as,
+            grouping.group_aliased, grouping.group_assignment,
+            grouping.align_comments, grouping.group_identifier_list]:
+        func(expected)
+    assert tree(stmt) == tree(expected)
+
+
+@pytest.mark.parametrize('s, dialect', [
+    ('select x[(1)], (a[2]), case when (b) then [c] end', None),
+    ('begin if x then case when y then 1 end; end if; end', 'oracle'),
+    ('for x in (select 1) loop begin null; end; end loop', 'oracle'),
+    ('case begin end', 'oracle'),
+    ('select ( x[1 ) ] (', None),
+    ('select ) ] end case ( x[', None),
+])
+def test_grouping_matching(s, dialect, tree):
+    from sqlparse.engine import grouping
+
+    stmt, expected = (sqlparse.parse(s, dialect=dialect)[0]
+                      for _ in range(2))
+    grouping.group_matching(stmt)
+    for func in [
+            grouping.group_brackets, grouping.group_parenthesis,
+            grouping.group_case, grouping.group_if, grouping.group_for,
+            grouping.group_begin]:
+        func(expected)
+    assert tree(stmt) == tree(expected)
@@ -1,7 +1,11 @@
 # -*- coding: utf-8 -*-
+import threading
+
 import pytest
 
-from sqlparse import tokens
+import sqlparse
+from sqlparse import dialects, keywords, tokens
+from sqlparse.exceptions import SQLParseError
 from sqlparse.keywords import SQL_REGEX
 
 
@@ -12,3 +16,76 @@ class TestSQLREGEX:
     def test_float_numbers(self, number):
         ttype = next(tt for action, tt in SQL_REGEX if action(number))
         assert tokens.Number.Float == ttype
+
+
+@pytest.mark.parametrize('db', ['BIGQUERY', 'ORACLE'])
+def test_is_keyword_precedence(monkeypatch, db):
+    monkeypatch.setattr(keywords, 'DB', db)
+    tables = keywords._keyword_tables(db)
+    words = set(word for table in tables for word in table)
+    for word in words | set(['foo', 'bar_baz']):
+        expected = tokens.Name
+        for table in tables:
+            if word in table:
+                expected = table[word]
+                break
+        assert keywords.is_keyword(word) == (expected, word)
+        assert keywords.is_keyword(word.lower()) == (expected, word.lower())
+
+
+def test_is_keyword_cache(monkeypatch):
+    monkeypatch.setattr(keywords, 'KEYWORD_CACHE_SIZE', 2)
+    monkeypatch.setattr(keywords, '_LOOKUPS', {})
+    for word in ['select', 'foo', 'from', 'select']:
+        assert keywords.is_keyword(word)[1] == word
+    _, cache = keywords._LOOKUPS[keywords.DB]
+    assert len(cache) <= 2
+
+
+@pytest.mark.parametrize('dialect, expected', [
+    ('bigquery', [tokens.Keyword, tokens.Keyword]),
+    ('oracle', [tokens.Name, tokens.Keyword.Order]),
+    ('ORACLE', [tokens.Name, tokens.Keyword.Order]),
+])
+def test_dialect_keywords(dialect, expected):
+    sql = 'select a over (rows unbounded preceding) from t order by a desc'
+    stmt = sqlparse.parse(sql, dialect=dialect)[0]
+    ttypes = dict((t.value, t.ttype) for t in stmt.flatten())
+    assert [ttypes['preceding'], ttypes['desc']] == expected
+
+
+def test_dialect_side_by_side():
+    sql = 'select preceding from t;'
+    expected = {'bigquery': 'SELECT PRECEDING FROM t;',
+                'oracle': 'SELECT preceding FROM t;'}
+    results = []
+
+    def work(dialect):
+        for _ in range(50):
+            results.append((dialect, sqlparse.format(
+                sql, keyword_case='upper', dialect=dialect)))
+
+    threads = [threading.Thread(target=work, args=(d,))
+               for d in ['bigquery', 'oracle'] * 4]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(results) == 400
+    assert all(res == expected[d] for d, res in results)
+
+
+def test_dialect_custom():
+    dialect = dialects.Dialect(
+        'custom', lambda: ({'FOO': tokens.Keyword}, keywords.KEYWORDS_COMMON))
+    stmt = sqlparse.parse('select foo from bar', dialect=dialect)[0]
+    assert [t.ttype for t in stmt.flatten()][::2] == [
+        tokens.Keyword.DML, tokens.Keyword, tokens.Keyword, tokens.Name]
+    assert dialect.is_keyword('foo') == (tokens.Keyword, 'foo')
+
+
+def test_dialect_unknown():
+    with pytest.raises(SQLParseError):
+        sqlparse.parse('select 1', dialect='nosql')
+    with pytest.raises(SQLParseError):
+        sqlparse.engine.FilterStack(dialect=42)
@@ -2,6 +2,9 @@
 
 """Tests sqlparse.parse()."""
 
+import copy
+import pickle
+
 import pytest
 
 import sqlparse
@@ -472,3 +475,330 @@ def test_parenthesis():
                                                     T.Newline,
                                                     T.Newline,
                                                     T.Punctuation]
+
+
+def test_pickle_statement(load_file, tree):
+    stmt = sqlparse.parse(load_file('function_psql.sql'))[0]
+    restored = pickle.loads(pickle.dumps(stmt, pickle.HIGHEST_PROTOCOL))
+    assert tree(restored) == tree(stmt)
+    assert restored.value == stmt.value
+    for token in restored.flatten():
+        while token.parent is not None:
+            token = token.parent
+        assert token is restored
+
+
+def test_copy_statement(tree):
+    stmt = sqlparse.parse('select a, b from t where x = 1')[0]
+    stmt.note = 'x'
+    shallow = copy.copy(stmt)
+    assert shallow.tokens == stmt.tokens and shallow.tokens is not stmt.tokens
+    assert all(token.parent is stmt for token in stmt.tokens)
+    deep = copy.deepcopy(stmt)
+    assert tree(deep) == tree(stmt)
+    assert all(token.parent is deep for token in deep.tokens)
+    assert all(token.parent is stmt for token in stmt.tokens)
+    for restored in [shallow, deep, pickle.loads(pickle.dumps(stmt))]:
+        assert restored.note == 'x'
+        assert restored.value == stmt.value
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 100])
+def test_parse_parallel(load_file, chunk_size, tree):
+    pytest.importorskip('concurrent.futures')
+    sql = u'\n'.join(load_file(fn) for fn in [
+        'function_psql.sql', 'begintag.sql', 'dashcomment.sql',
+        'huge_select.sql'])
+    stmts = sqlparse.parse_parallel(sql, workers=2, chunk_size=chunk_size)
+    assert [tree(stmt) for stmt in stmts] == [
+        tree(stmt) for stmt in sqlparse.parse(sql)]
+
+
+def test_parse_parallel_executor():
+    futures = pytest.importorskip('concurrent.futures')
+    from sqlparse.engine import parallel
+
+    sql = u'select 1; select 2;\nselect 3'
+    assert list(parallel._chunks(sql, 2, None)) == [
+        u'select 1; select 2;', u'\nselect 3']
+    with futures.ThreadPoolExecutor(1) as executor:
+        stmts = sqlparse.parse_parallel(sql, chunk_size=2, executor=executor)
+        # An executor passed in isn't shut down.
+        assert executor.submit(len, 'ab').result() == 2
+    assert [text_type(stmt) for stmt in stmts] == [
+        u'select 1; ', u'select 2;', u'\nselect 3']
+
+
+def test_parse_parallel_dialect():
+    pytest.importorskip('concurrent.futures')
+    sql = 'select preceding from t; select 1'
+    for dialect, ttype in [('oracle', T.Name), ('bigquery', T.Keyword)]:
+        stmts = sqlparse.parse_parallel(sql, workers=1, dialect=dialect)
+        assert [str(stmt) for stmt in stmts] == ['select preceding from t; ',
+                                                 'select 1']
+        assert list(stmts[0].flatten())[2].ttype is ttype
+    with pytest.raises(sqlparse.exceptions.SQLParseError):
+        sqlparse.parse_parallel(sql, dialect='nosql')
+
+
+@pytest.mark.parametrize('options', [{}, {'workers': 1, 'chunk_size': 1}])
+def test_parse_many(load_file, options, tree):
+    if 'workers' in options:
+        pytest.importorskip('concurrent.futures')
+    queries = [load_file('function_psql.sql'), 'select 1; select 2', '',
+               b'select 3']
+    expected = [[tree(stmt) for stmt in sqlparse.parse(text)]
+                for text in queries]
+    assert [[tree(stmt) for stmt in stmts] for stmts in
+            sqlparse.parse_many(queries, **options)] == expected
+    with pytest.raises(sqlparse.exceptions.SQLParseError):
+        sqlparse.parse_many(queries, dialect='nosql', **options)
+
+
+def test_parse_many_is_lazy():
+    def queries():
+        yield u"select 'unterminated"
+        yield u'select 2'
+        raise AssertionError('consumed too early')
+
+    # Each query is parsed on its own, nothing leaks into the next one.
+    stmts = sqlparse.parse_many(queries())
+    assert [text_type(stmt) for stmt in next(stmts)] == [
+        u"select 'unterminated"]
+    assert [text_type(stmt) for stmt in next(stmts)] == [u'select 2']
+
+
+def test_parse_cache(load_file, tree):
+    from sqlparse.engine.cache import ParseCache
+    from sqlparse.filters import ReindentFilter, StripWhitespaceFilter
+
+    sql = load_file('function_psql.sql')
+    cache = ParseCache()
+    expected = [tree(stmt) for stmt in sqlparse.parse(sql)]
+    for _ in range(3):
+        stmts = sqlparse.parse(sql, cache=cache)
+        assert [tree(stmt) for stmt in stmts] == expected
+        for token in stmts[0].flatten():
+            while token.parent is not None:
+                token = token.parent
+            assert token is stmts[0]
+        # Changes to returned statements don't reach the cache.
+        for stmt in stmts:
+            StripWhitespaceFilter().process(stmt)
+            ReindentFilter().process(stmt)
+    assert (cache.hits, cache.misses, len(cache)) == (2, 1, 1)
+    sqlparse.parse(sql.encode('utf-8'), cache=cache)
+    assert cache.hits == 3
+
+
+def test_parse_cache_key():
+    from sqlparse.engine.cache import ParseCache
+
+    cache = ParseCache()
+    sql = 'select preceding from t'
+    for dialect, ttype in [('oracle', T.Name), ('bigquery', T.Keyword),
+                           ('oracle', T.Name)]:
+        stmt = sqlparse.parse(sql, dialect=dialect, cache=cache)[0]
+        assert list(stmt.flatten())[2].ttype is ttype
+    sqlparse.parse(sql, dialect='oracle', coalesce_whitespace=True,
+                   cache=cache)
+    assert (cache.hits, cache.misses) == (1, 3)
+
+
+def test_parse_cache_eviction():
+    from sqlparse.engine.cache import ParseCache
+
+    cache = ParseCache(maxsize=2)
+    for text in ['select 1', 'select 2', 'select 1', 'select 3', 'select 2']:
+        sqlparse.parse(text, cache=cache)
+    assert (cache.hits, cache.misses, cache.evictions) == (1, 4, 2)
+    assert len(cache) == 2
+    # Entries are evicted in the order of their last use.
+    sqlparse.parse('select 3', cache=cache)
+    assert cache.hits == 2
+    sqlparse.parse('select 1', cache=cache)
+    assert (cache.misses, cache.evictions) == (5, 3)
+
+    cache = ParseCache(maxsize=None, maxbytes=1)
+    sqlparse.parse('select 1', cache=cache)
+    assert (len(cache), cache.nbytes) == (0, 0)
+    cache.maxbytes = None
+    for i in range(10):
+        sqlparse.parse('select {0}'.format(i), cache=cache)
+    assert len(cache) == 10
+    cache.maxbytes = cache.nbytes // 2
+    sqlparse.parse('select 10', cache=cache)
+    assert 0 < cache.nbytes <= cache.maxbytes
+    assert len(cache) + cache.evictions == 11
+    cache.clear()
+    assert (len(cache), cache.nbytes) == (0, 0)
+
+
+def test_parse_cache_db(monkeypatch):
+    from sqlparse import keywords
+    from sqlparse.engine.cache import ParseCache, TemplateCache
+
+    def ttypes(stmts):
+        return [token.ttype for token in stmts[0].flatten()]
+
+    for cache in ParseCache(), TemplateCache():
+        for db in 'BIGQUERY', 'ORACLE', 'BIGQUERY':
+            monkeypatch.setattr(keywords, 'DB', db)
+            stmts = sqlparse.parse('select rowid from t', cache=cache)
+            assert ttypes(stmts) == ttypes(sqlparse.parse(
+                'select rowid from t'))
+        assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_template_cache(load_file, tree):
+    from sqlparse.engine.cache import TemplateCache
+
+    cache = TemplateCache()
+    queries = [load_file('function_psql.sql'),
+               "select * from t where a = 1 and b in ('x', :p); select 2",
+               "select * from t where a = 42 and b in ('yz', :q); select 3",
+               "select * from t where a = 1.5 and b in ('x', :p); select 2",
+               "select * from t where a = 1 and b in ('x', :p); select 2",
+               "select * from t where a = 1 and c in ('x', :p); select 2"]
+    for text in queries:
+        stmts = sqlparse.parse(text, cache=cache)
+        assert [tree(stmt) for stmt in stmts] == [
+            tree(stmt) for stmt in sqlparse.parse(text)]
+        assert [stmt.value for stmt in stmts] == [
+            text_type(stmt) for stmt in stmts]
+    # Only the literals differ in the 2nd, 3rd and 5th query.
+    assert (cache.hits, cache.misses, len(cache)) == (2, 4, 4)
+
+
+def test_template_cache_bind():
+    from sqlparse.engine.cache import TemplateCache
+
+    cache = TemplateCache()
+    first = sqlparse.parse(
+        "select f(1, 'a') as c from t where x in (2, :p)", cache=cache)[0]
+    assert first.tokens[-1].value == u'where x in (2, :p)'
+    stmt = sqlparse.parse(
+        "select f(10, 'b''c') as c from t where x in (-20, :q)",
+        cache=cache)[0]
+    assert cache.hits == 1
+    # The literals are bound in order, values of groups are joined anew.
+    literals = [token for token in stmt.flatten() if token.ttype in (
+        T.Number.Integer, T.String.Single, T.Name.Placeholder)]
+    assert [token.value for token in literals] == [
+        u'10', u"'b''c'", u'-20', u':q']
+    assert stmt.tokens[-1].value == u'where x in (-20, :q)'
+    assert stmt.tokens[2].get_alias() == u'c'
+    assert all(token.parent.parent is not None for token in literals)
+    # The statements returned before don't change.
+    assert text_type(first) == (
+        u"select f(1, 'a') as c from t where x in (2, :p)")
+
+
+def test_template_cache_size():
+    from sqlparse.engine.cache import TemplateCache
+
+    cache = TemplateCache()
+    sqlparse.parse('select a from t', cache=cache)
+    size = cache.nbytes
+    cache.clear()
+    sqlparse.parse('select {0} from t'.format('a' * 1000), cache=cache)
+    # The name is stored in the key and in the tree.
+    assert cache.nbytes - size > 1900
+
+
+@pytest.mark.parametrize('offset, deleted, inserted', [
+    (0, 0, 'select 0; '),
+    (7, 1, '42'),             # inside the first statement
+    (9, 0, ' '),              # trailing whitespace of the first one
+    (8, 1, ''),               # removes a split point
+    (18, 0, ';'),             # adds one
+    (30, 0, '/*'),            # comments out a statement boundary
+    (45, 4, "'; select 5"),
+    (57, 0, 'select 6'),      # appends
+    (0, 57, ''),
+])
+def test_reparse(offset, deleted, inserted, tree):
+    sql = "select 1; select 2 from t; select 3; select 'x;y' ;\n-- 4\n"
+    assert len(sql) == 57
+    stmts = sqlparse.parse(sql)
+    new = sql[:offset] + inserted + sql[offset + deleted:]
+    result = sqlparse.reparse(stmts, offset, deleted, inserted)
+    assert [tree(stmt) for stmt in result] == [
+        tree(stmt) for stmt in sqlparse.parse(new)]
+
+
+def test_reparse_reuses_statements():
+    stmts = sqlparse.parse(';'.join('select {0}'.format(i)
+                                    for i in range(10)))
+    result = sqlparse.reparse(stmts, 34, 1, 'x')
+    assert str(result[3]) == 'select x;'
+    assert [stmt is old for stmt, old in zip(result, stmts)] == (
+        [True] * 2 + [False] * 2 + [True] * 6)
+
+
+def test_reparse_unclosed_comment(tree):
+    sql = 'select 1 /* a; select 2; select 3; select 4'
+    stmts = sqlparse.parse(sql)
+    assert len(stmts) == 4
+    result = sqlparse.reparse(stmts, 40, 0, '*/')
+    assert len(result) == 1
+    assert [tree(stmt) for stmt in result] == [
+        tree(stmt) for stmt in sqlparse.parse(sql[:40] + '*/' + sql[40:])]
+    with pytest.raises(ValueError):
+        sqlparse.reparse(stmts, 40, 10, '')
+
+
+def test_parse_lazy(load_file, monkeypatch, tree):
+    from sqlparse.engine import grouping
+    group_stmt = grouping.group
+    grouped = []
+
+    def group(stmt):
+        grouped.append(stmt)
+        return group_stmt(stmt)
+
+    monkeypatch.setattr(grouping, 'group', group)
+    text = u'\n'.join(load_file(fn) for fn in [
+        'function_psql.sql', 'begintag.sql', 'dashcomment.sql'])
+    text += '/* c */ select 1; with x as (select 2) select * from x'
+    stmts = sqlparse.parse(text, lazy=True)
+    expected = sqlparse.parse(text)
+    del grouped[:]
+    assert [str(stmt) for stmt in stmts] == [str(stmt) for stmt in expected]
+    assert [[token.value for token in stmt.flatten()] for stmt in stmts] == [
+        [token.value for token in stmt.flatten()] for stmt in expected]
+    assert ([stmt.get_type() for stmt in stmts[:-1]] ==
+            [stmt.get_type() for stmt in expected[:-1]])
+    assert grouped == []
+
+    assert stmts[-1].get_type() == 'SELECT'
+    assert grouped == [stmts[-1]]
+    assert [tree(stmt) for stmt in stmts] == [
+        tree(stmt) for stmt in expected]
+    assert all(isinstance(stmt, sql.LazyStatement) for stmt in stmts)
+    assert len(grouped) == len(stmts)
+
+
+def test_parse_lazy_groups_once(monkeypatch):
+    from sqlparse.engine import grouping
+    group_stmt = grouping.group
+    grouped = []
+
+    def group(stmt):
+        grouped.append(stmt)
+        return group_stmt(stmt)
+
+    monkeypatch.setattr(grouping, 'group', group)
+    stmt, = sqlparse.parse('select a, b from t where x = 1', lazy=True)
+    tokens = stmt.flatten()
+    assert next(tokens).value == 'select'
+    assert grouped == []
+    # Grouping starts on the first use of the tokens, the iteration
+    # continues over the tokens as they were.
+    assert isinstance(stmt.tokens[2], sql.IdentifierList)
+    assert grouped == [stmt]
+    assert [token.value for token in tokens][:3] == [' ', 'a', ',']
+    assert isinstance(stmt.tokens[-1], sql.Where)
+    assert len(list(stmt.get_sublists())) == 3
+    assert str(stmt) == u'select a, b from t where x = 1'
+    assert grouped == [stmt]
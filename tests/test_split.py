@@ -2,11 +2,18 @@
 
 # Tests splitting functions.
 
+import copy
+import io
+import json
+import mmap
+import pickle
 import types
 
 import pytest
 
 import sqlparse
+from sqlparse import lexer, tokens as T
+from sqlparse.engine import StatementSplitter
 from sqlparse.compat import StringIO, text_type
 
 
@@ -149,3 +156,167 @@ def test_split_quotes_with_new_line():
     stmts = sqlparse.split("select 'foo\n\bar'")
     assert len(stmts) == 1
     assert stmts[0] == "select 'foo\n\bar'"
+
+
+@pytest.mark.parametrize('fn', ['function.sql', 'function_psql.sql',
+                                'function_psql2.sql', 'function_psql3.sql',
+                                'function_psql4.sql', 'begintag.sql',
+                                'begintag_2.sql', 'dashcomment.sql'])
+def test_split_without_tokens(load_file, fn):
+    sql = load_file(fn)
+    sql = u'select 1;  -- one\n{0};\nselect 2;  \n'.format(sql)
+    expected = [text_type(stmt) for stmt in
+                StatementSplitter().process(lexer.tokenize(sql))]
+    stmts = list(StatementSplitter().split(lexer.tokenize(sql)))
+    assert stmts == expected
+    assert sqlparse.split(sql) == [stmt.strip() for stmt in expected]
+
+
+@pytest.mark.parametrize('fn', ['function_psql.sql', 'begintag.sql',
+                                'dashcomment.sql'])
+def test_split_spans(load_file, fn):
+    sql = u"select 'ä;'; -- one\n{0};\nselect 2;  \n".format(load_file(fn))
+    spans = list(sqlparse.split_spans(sql))
+    assert spans[0][0] == 0 and spans[-1][1] == len(sql)
+    assert all(a[1] == b[0] for a, b in zip(spans, spans[1:]))
+    assert [sql[start:end].strip() for start, end in spans] == (
+        sqlparse.split(sql))
+
+    data = sql.encode('utf-8')
+    spans = list(sqlparse.split_spans(data))
+    assert [data[start:end].decode('utf-8').strip()
+            for start, end in spans] == sqlparse.split(sql)
+
+
+def test_split_spans_mmap(tmpdir):
+    sql = u'select 1;\nselect \'ö;\';\nbegin select 2; end;'
+    path = tmpdir.join('dump.sql')
+    path.write_binary(sql.encode('cp1252'))
+    with open(str(path), 'rb') as f:
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        spans = list(sqlparse.split_spans(buf, encoding='cp1252'))
+        stmts = [buf[start:end].decode('cp1252') for start, end in spans]
+        buf.close()
+    assert [stmt.strip() for stmt in stmts] == sqlparse.split(sql)
+
+
+def test_split_state():
+    sql = u'create table t (a int, b text);'
+    stream = list(lexer.tokenize(sql + u' select 2'))
+    splitter = StatementSplitter()
+    assert list(splitter.feed(stream[:5])) == []
+    state = json.loads(json.dumps(splitter.get_state()))
+    assert state['is_create'] and len(state['tokens']) == 5
+    splitter = StatementSplitter()
+    splitter.set_state(state)
+    stmts = list(splitter.feed(stream[5:], final=True))
+    assert [text_type(stmt) for stmt in stmts] == [sql + u' ', u'select 2']
+    assert [token.ttype for token in stmts[0].tokens[:3]] == [
+        T.Keyword.DDL, T.Whitespace, T.Keyword]
+
+
+@pytest.mark.parametrize('binary', [True, False])
+def test_split_checkpoints(tmpdir, binary):
+    from sqlparse.engine.checkpoint import parsestream
+
+    sql = u"select 'ä;ö'; -- 1\nbegin; select 2; end;\nselect 3;\nselect 4"
+    path = tmpdir.join('audit.sql')
+    path.write_binary(sql.encode('utf-8'))
+    mode, encoding = ('rb', None) if binary else ('r', 'utf-8')
+
+    def parse(checkpoint=None):
+        with io.open(str(path), mode, encoding=encoding) as f:
+            return [(text_type(stmt), ckpt) for stmt, ckpt
+                    in parsestream(f, checkpoint=checkpoint, chunk_size=4)]
+
+    pairs = parse()
+    assert [stmt for stmt, _ in pairs] == [
+        text_type(stmt) for stmt in sqlparse.parse(sql)]
+    assert pairs[1][1]['offset'] == len(u"select 'ä;ö'; -- 1\nbegin; ")
+    assert pairs[1][1]['byte_offset'] == (
+        len(u"select 'ä;ö'; -- 1\nbegin; ".encode('utf-8'))
+        if binary else None)
+    assert [stmt for stmt, _ in parse(pairs[1][1])] == [
+        stmt for stmt, _ in pairs[2:]]
+
+    # The last statement may continue when the file grows.
+    path.write_binary((sql + u'1;\nselect 5').encode('utf-8'))
+    assert [stmt for stmt, _ in parse(pairs[-1][1])] == [
+        u'\nselect 41;', u'\nselect 5']
+
+
+@pytest.mark.parametrize('encoding', ['utf-16', 'utf-8-sig'])
+def test_split_checkpoints_bom(tmpdir, encoding):
+    from sqlparse.engine.checkpoint import parsestream
+
+    sql = u"select 'ä'; select 2;\nselect 3"
+    path = tmpdir.join('audit.sql')
+    path.write_binary(sql.encode(encoding))
+
+    def parse(checkpoint=None):
+        with io.open(str(path), 'rb') as f:
+            return [(text_type(stmt), ckpt) for stmt, ckpt in parsestream(
+                f, encoding, checkpoint=checkpoint, chunk_size=4)]
+
+    pairs = parse()
+    assert pairs[0][1]['byte_offset'] == len(
+        u"select 'ä'; ".encode(encoding))
+    assert [stmt for stmt, _ in parse(pairs[0][1])] == [
+        stmt for stmt, _ in pairs[1:]]
+
+
+def test_split_max_tokens():
+    rows = u', '.join(u"({0}, 'n{0}')".format(i) for i in range(20))
+    sql = u'select 1; insert into t (a, b) values {0}; select 2'.format(rows)
+    stmts = list(sqlparse.parsestream(StringIO(sql), max_tokens=30))
+    assert u''.join(text_type(stmt) for stmt in stmts) == sql
+    assert type(stmts[0]) is sqlparse.sql.Statement
+    assert type(stmts[-1]) is sqlparse.sql.Statement
+    pieces = stmts[1:-1]
+    assert all(isinstance(stmt, sqlparse.sql.StatementFragment)
+               for stmt in pieces)
+    assert [stmt.index for stmt in pieces] == list(range(len(pieces)))
+    assert [stmt.is_last for stmt in pieces] == (
+        [False] * (len(pieces) - 1) + [True])
+    assert all(stmt.groupable for stmt in pieces)
+    # Cut behind whole rows, which are grouped.
+    assert text_type(pieces[0]).endswith(u"(1, 'n1'),")
+    assert isinstance(pieces[1].tokens[1], sqlparse.sql.Parenthesis)
+    assert pieces[0].get_type() == 'INSERT'
+
+
+def test_split_max_tokens_hard_cut():
+    sql = u'select {0}; select 2'.format(u', '.join(map(str, range(30))))
+    stmts = list(sqlparse.parsestream(StringIO(sql), max_tokens=20))
+    assert u''.join(text_type(stmt) for stmt in stmts) == sql
+    assert [len(stmt.tokens) for stmt in stmts[:-2]] == [20] * 4
+    assert not any(stmt.groupable for stmt in stmts[:-1])
+    assert stmts[-2].is_last and not stmts[-3].is_last
+    assert all(not token.is_group for token in stmts[0].tokens)
+
+
+def test_split_max_tokens_pickle():
+    sql = u'select {0}'.format(u', '.join(map(str, range(30))))
+    pieces = list(sqlparse.parsestream(StringIO(sql), max_tokens=20))
+    for piece in pieces:
+        for restored in [pickle.loads(pickle.dumps(piece)),
+                         copy.deepcopy(piece), copy.copy(piece)]:
+            assert type(restored) is sqlparse.sql.StatementFragment
+            assert text_type(restored) == text_type(piece)
+            assert ((restored.index, restored.is_last, restored.groupable)
+                    == (piece.index, piece.is_last, piece.groupable))
+
+
+def test_split_max_tokens_state():
+    sql = u'insert into t values (1), (2), (3), (4), (5)'
+    splitter = StatementSplitter(max_tokens=12)
+    stream = list(lexer.tokenize(sql))
+    pieces = list(splitter.feed(stream[:16]))
+    state = json.loads(json.dumps(splitter.get_state()))
+    assert state['fragment'] == [1, True] and state['in_values']
+    splitter = StatementSplitter(max_tokens=12)
+    splitter.set_state(state)
+    pieces += list(splitter.feed(stream[16:], final=True))
+    assert [text_type(stmt) for stmt in pieces] == [
+        u'insert into t values (1),', u' (2), (3),', u' (4), (5)']
+    assert [stmt.index for stmt in pieces] == [0, 1, 2]
@@ -1,5 +1,13 @@
 # -*- coding: utf-8 -*-
 
+import codecs
+import copy
+import io
+import pickle
+import re
+import string
+import subprocess
+import sys
 import types
 
 import pytest
@@ -7,7 +15,7 @@ import pytest
 import sqlparse
 from sqlparse import lexer
 from sqlparse import sql, tokens as T
-from sqlparse.compat import StringIO
+from sqlparse.compat import StringIO, text_type
 
 
 def test_tokenize_simple():
@@ -118,6 +126,37 @@ def test_tokenlist_token_matching():
     assert x.token_matching([lambda t: t.ttype is T.Keyword], 1) is None
 
 
+def test_tokenlist_value():
+    p = sqlparse.parse('select f(a, b) from t')[0]
+    func = p.tokens[2]
+    assert p.value == p.normalized == 'select f(a, b) from t'
+    assert func.value == 'f(a, b)'
+
+    p.tokens[2].tokens[1].insert_before(1, sql.Token(T.Whitespace, ' '))
+    assert func.value == 'f( a, b)'
+    assert p.value == 'select f( a, b) from t'
+
+    x = sql.TokenList([sql.Token(T.Name, 'a')])
+    x.group_tokens(sql.TokenList, 0, 0)
+    assert x.tokens[0].value == x.value == 'a'
+    x.insert_after(0, sql.Token(T.Name, 'b'))
+    x.group_tokens(sql.TokenList, 0, 1, extend=True)
+    assert x.tokens[0].value == x.value == 'ab'
+
+
+def test_tokenlist_token_index():
+    p = sqlparse.parse('select a, b, c from t')[0]
+    tokens = list(p.tokens)
+    assert [p.token_index(token) for token in tokens] == list(range(7))
+    assert p.token_index(tokens[2]) == 2
+    assert p.token_index(tokens[6], start=tokens[2]) == 6
+    p.insert_before(2, sql.Token(T.Whitespace, ' '))
+    assert p.token_index(tokens[2]) == 3
+    assert p.token_index(tokens[0]) == 0
+    with pytest.raises(ValueError):
+        p.token_index(tokens[0], start=1)
+
+
 def test_stream_simple():
     stream = StringIO("SELECT 1; SELECT 2;")
 
@@ -183,3 +222,298 @@ def test_parse_identifiers(s):
     token = p.tokens[0]
     assert str(token) == s
     assert isinstance(token, sql.Identifier)
+
+
+def _tokenize_rule_by_rule(text):
+    # Reference implementation: try every rule of SQL_REGEX in turn.
+    from sqlparse.keywords import SQL_REGEX
+    pos = 0
+    while pos < len(text):
+        for rexmatch, action in SQL_REGEX:
+            m = rexmatch(text, pos)
+            if m:
+                if isinstance(action, T._TokenType):
+                    yield action, m.group()
+                else:
+                    yield action(m.group())
+                pos = m.end()
+                break
+        else:
+            yield T.Error, text[pos]
+            pos += 1
+
+
+@pytest.mark.parametrize('s', [
+    "select $$foo; 'bar'$$, $tag$x$$y$tag$ from t",
+    u"select `a``b`, ´c´, \"d\"\"e\", 'f''g', '\\\\' -- x\n;",
+    "/*+ hint */ select a.b, c(d), 1.5e-3, -0x1F, :p, %(q)s, ? {",
+    "left outer join t using (x) where y is not null union all end if",
+    u"select ´a´, \u00c0bc, \u017felect, \u212a from t",
+])
+def test_tokenize_combined_rules(s):
+    assert list(lexer.tokenize(s)) == list(_tokenize_rule_by_rule(s))
+
+
+@pytest.mark.parametrize('fn', ['begintag.sql', 'dashcomment.sql',
+                                'function_psql.sql', 'huge_select.sql'])
+def test_tokenize_combined_rules_files(load_file, fn):
+    s = load_file(fn)
+    assert list(lexer.tokenize(s)) == list(_tokenize_rule_by_rule(s))
+
+
+@pytest.mark.parametrize('pattern, chars', [
+    (r'\*', '*'),
+    (r'(--|# ).*?$', '-#'),
+    (r'-?\d+', '-0123456789'),
+    (r'(?<!\w)[$:?]\w+', '$:?'),
+    (r'END\b', 'Ee'),
+    (u'[A-Z\u00c0-\u00dc]\\w*', string.ascii_letters),
+    (r'[\d_]', string.digits + '_'),
+])
+def test_first_chars(pattern, chars):
+    assert lexer.first_chars(pattern, re.IGNORECASE) == frozenset(chars)
+
+
+@pytest.mark.parametrize('pattern', [r'\s*', r'a?', r'(a)?\1', r'.x'])
+def test_first_chars_any(pattern):
+    assert lexer.first_chars(pattern) is None
+
+
+_LONG_TOKENS = u"""\
+select 'a string with ''quotes'' and \\\\ and \\' that is long', x -- a
+-- a dash comment that spans more than one chunk of the stream
+/* a multiline comment that
+   spans more than one chunk */ `a quoted name spanning chunks`;
+create function f() returns int as $body$ select 'x'; $bod $body$;
+select "a double quoted name that spans chunks" from dual # hash comment
+"""
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 7, 64])
+def test_tokenize_stream_chunks(chunk_size):
+    expected = list(lexer.tokenize(_LONG_TOKENS))
+    stream = lexer.tokenize_stream(
+        StringIO(_LONG_TOKENS), chunk_size=chunk_size,
+        lexer=lexer.IncrementalLexer(lookahead=16))
+    assert list(stream) == expected
+
+
+@pytest.mark.parametrize('s', [u"select 'unterminated", u'/* unterminated',
+                               u'$a$ unterminated', u'-- no newline'])
+def test_tokenize_stream_unterminated(s):
+    expected = list(lexer.tokenize(s))
+    stream = lexer.tokenize_stream(
+        StringIO(s), chunk_size=3, lexer=lexer.IncrementalLexer(lookahead=4))
+    assert list(stream) == expected
+
+
+_LOOKBEHIND = 'x ' * 3000 + 'select arr[1] from t where a=:p;' + ' y' * 3000
+
+
+@pytest.mark.parametrize('mark', ['[', ':p'])
+@pytest.mark.parametrize('delta', range(-2, 3))
+def test_tokenize_stream_lookbehind(mark, delta):
+    # The rules for "name[1]" and ":p" look at the character in front of
+    # them, which must survive the cut at the end of the safe region.
+    cut = _LOOKBEHIND.index(mark) + lexer.LOOKAHEAD + delta
+    lx = lexer.IncrementalLexer()
+    tokens = list(lx.feed(_LOOKBEHIND[:cut]))
+    tokens.extend(lx.feed(_LOOKBEHIND[cut:], final=True))
+    assert tokens == list(lexer.tokenize(_LOOKBEHIND))
+
+
+@pytest.mark.parametrize('s', [u'select foo{0}. bar from t',
+                               u'select * from a left{0}outer join b'])
+@pytest.mark.parametrize('cut', [1, 1500, 2999])
+def test_tokenize_stream_long_whitespace(s, cut):
+    # More whitespace than the lookahead, cut in the middle.
+    s = s.format(u' ' * 3000)
+    start = s.index(u' ' * 3000)
+    lx = lexer.IncrementalLexer()
+    tokens = list(lx.feed(s[:start + cut]))
+    tokens.extend(lx.feed(s[start + cut:], final=True))
+    assert tokens == list(lexer.tokenize(s))
+
+
+def test_tokenize_stream_context():
+    lx = lexer.IncrementalLexer(context=u'select arr')
+    assert list(lx.feed(u'[1]', final=True)) == [(T.Punctuation, u'['),
+                                                 (T.Number.Integer, u'1'),
+                                                 (T.Punctuation, u']')]
+
+
+def test_tokenize_stream_bytes():
+    s = u"select 'Песня про надежду';"
+    stream = io.BytesIO(s.encode('utf-8'))
+    assert list(lexer.tokenize_stream(stream, chunk_size=5)) == \
+        list(lexer.tokenize(s))
+
+
+def test_tokenize_stream_bounded_buffer():
+    lx = lexer.IncrementalLexer(lookahead=16)
+    for _ in range(1000):
+        list(lx.feed(u'select foo from bar; '))
+        assert len(lx._buffer) < 64
+
+
+@pytest.mark.parametrize('fn, encoding', [('encoding_utf8.sql', 'utf-8'),
+                                          ('encoding_gbk.sql', 'gbk'),
+                                          ('test_cp1251.sql', 'cp1251')])
+def test_tokenize_file(filepath, fn, encoding):
+    with io.open(filepath(fn), 'rb') as f:
+        data = f.read()
+    tokens = list(lexer.tokenize_file(filepath(fn), encoding))
+    assert [(ttype, data[start:end].decode(encoding))
+            for ttype, start, end in tokens] == \
+        list(lexer.tokenize(data.decode(encoding)))
+    assert tokens[-1][2] == len(data)
+
+
+@pytest.mark.parametrize('bom, encoding, codec', [
+    (codecs.BOM_UTF16_LE, 'utf-16', 'utf-16-le'),
+    (codecs.BOM_UTF16_BE, 'utf-16', 'utf-16-be'),
+    (codecs.BOM_UTF32_LE, 'utf-32', 'utf-32-le'),
+    (codecs.BOM_UTF8, 'utf-8-sig', 'utf-8'),
+    (b'', 'utf-8-sig', 'utf-8'),
+])
+def test_tokenize_buffer_bom(bom, encoding, codec):
+    s = u"select 'Песня', x\n  from t;"
+    data = bom + s.encode(codec)
+    tokens = list(lexer.tokenize_buffer(data, encoding, chunk_size=5))
+    assert tokens[0][1] == len(bom)
+    assert [(ttype, data[start:end].decode(codec))
+            for ttype, start, end in tokens] == list(lexer.tokenize(s))
+    assert tokens[-1][2] == len(data)
+
+
+def test_tokenize_file_empty(tmpdir):
+    path = tmpdir.join('empty.sql')
+    path.write('')
+    assert list(lexer.tokenize_file(str(path))) == []
+
+
+def test_tokenize_buffer_regions():
+    data = u"select 'Песня про надежду' from t;".encode('utf-8')
+    tokens = lexer.tokenize_buffer(data, chunk_size=3)
+    assert [data[start:end] for _, start, end in tokens] == \
+        [v.encode('utf-8') for _, v in lexer.tokenize(data.decode('utf-8'))]
+
+
+def test_tokenize_spans(load_file):
+    s = load_file('function_psql.sql') + u' select ´x´, {'
+    spans = list(lexer.tokenize_spans(s))
+    assert [(ttype, s[start:end]) for ttype, start, end in spans] == \
+        list(lexer.tokenize(s))
+
+
+def test_tokenize_spans_type_error():
+    with pytest.raises(TypeError):
+        lexer.tokenize_spans(b'select 1')
+
+
+def test_span_token():
+    s = u'select Foo'
+    token = sql.SpanToken(T.Keyword.DML, s, 0, 6)
+    assert token.value == 'select'
+    assert token.normalized == 'SELECT'
+    assert token.is_keyword and not token.is_whitespace
+    assert token.match(T.Keyword.DML, 'SELECT')
+    token = sql.SpanToken(T.Name, s, 7, 10)
+    assert str(token) == token.normalized == 'Foo'
+    token.value = 'bar'
+    assert str(token) == 'bar'
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7),
+                    reason='submodules are imported eagerly before PEP 562')
+def test_import_is_lazy():
+    code = ('import sys, sqlparse; '
+            'print(sorted(set(sys.modules) & {"argparse", "sqlparse.cli", '
+            '"sqlparse.filters", "sqlparse.keywords"}))')
+    out = subprocess.check_output([sys.executable, '-c', code])
+    assert out.strip() == b'[]'
+
+
+def test_rule_table_cache(tmpdir):
+    from sqlparse.keywords import SQL_REGEX
+    sql = u"select 'a', $x$ b $x$ from t -- c"
+    expected = list(lexer.RuleTable(SQL_REGEX).get_tokens(sql))
+
+    first = lexer.RuleTable(SQL_REGEX, cache_dir=str(tmpdir))
+    assert len(tmpdir.listdir()) == 1
+    second = lexer.RuleTable(SQL_REGEX, cache_dir=str(tmpdir))
+    assert list(first.get_tokens(sql)) == expected
+    assert list(second.get_tokens(sql)) == expected
+
+    # An index written for other rules is ignored.
+    rules = SQL_REGEX[1:]
+    assert (list(lexer.RuleTable(rules).get_tokens(sql))
+            == list(lexer.RuleTable(rules, cache_dir=str(tmpdir))
+                    .get_tokens(sql)))
+
+
+def test_rule_table_cache_broken(tmpdir):
+    from sqlparse.keywords import SQL_REGEX
+    lexer.RuleTable(SQL_REGEX, cache_dir=str(tmpdir))
+    path = tmpdir.listdir()[0]
+    path.write_binary(b'garbage')
+    table = lexer.RuleTable(SQL_REGEX, cache_dir=str(tmpdir))
+    assert list(table.get_tokens(u'select 1')) == list(
+        lexer.tokenize(u'select 1'))
+
+
+def test_tokenize_coalesce_whitespace():
+    sql = u'select  a,\t b\n\n  from x '
+    tokens = list(lexer.tokenize(sql, coalesce_whitespace=True))
+    assert [value for ttype, value in tokens if ttype in T.Whitespace] == [
+        u'  ', u'\t ', u'\n', u'\n', u'  ', u' ', u' ']
+    assert u''.join(value for _, value in tokens) == sql
+    assert list(lexer.tokenize(StringIO(sql), coalesce_whitespace=True)
+                ) == tokens
+
+
+@pytest.mark.parametrize('fn', ['function_psql.sql', 'huge_select.sql',
+                                'test_cp1251.sql'])
+def test_parse_coalesce_whitespace(load_file, fn):
+    sql = load_file(fn, encoding='cp1251' if 'cp1251' in fn else 'utf-8')
+    stmts = sqlparse.parse(sql, coalesce_whitespace=True)
+    assert u''.join(text_type(stmt) for stmt in stmts) == sql
+    expected = sqlparse.parse(sql)
+    strip = lambda stmt: [t for t in stmt.flatten() if not t.is_whitespace]
+    assert ([[(t.ttype, t.value) for t in strip(stmt)] for stmt in stmts]
+            == [[(t.ttype, t.value) for t in strip(stmt)]
+                for stmt in expected])
+
+
+@pytest.mark.parametrize('ttype, parent, expected', [
+    (T.Keyword.DML, T.Keyword, True),
+    (T.Keyword, T.Keyword, True),
+    (T.Keyword, T.Keyword.DML, False),
+    (T.Name, T.Keyword, False),
+    (T.String.Single, T.Literal, True),
+    (T.Keyword, T.Token, True),
+    (None, T.Keyword, False),
+    (('Keyword', 'DML'), T.Keyword, True),
+    (('Name',), T.Keyword, False),
+    (T._TokenType(('Keyword', 'DML')), T.Keyword, True),
+    (T.Keyword.DML, T._TokenType(('Keyword',)), True),
+    (T.Name, T._TokenType(('Keyword',)), False),
+    (T.Keyword, T._TokenType(), True),
+])
+def test_tokentype_contains(ttype, parent, expected):
+    assert (ttype in parent) is expected
+
+
+def test_tokentype_new_child():
+    ttype = T.Keyword.Custom.Sub
+    assert ttype in T.Keyword.Custom
+    assert ttype in T.Keyword
+    assert ttype not in T.Name
+    assert ttype.parent is T.Keyword.Custom
+
+
+@pytest.mark.parametrize('ttype', [T.Token, T.Keyword, T.String.Single])
+def test_tokentype_copy(ttype):
+    assert copy.copy(ttype) is ttype
+    assert copy.deepcopy(ttype) is ttype
+    assert pickle.loads(pickle.dumps(ttype)) is ttype